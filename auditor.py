@@ -1,5 +1,72 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
 import pandas as pd
-from pyswip import Prolog
+from pyswip import Atom, Prolog
+
+# Per-entry tracing goes through this logger at DEBUG level, so it costs nothing
+# unless enabled, e.g. with logging.basicConfig(level=logging.DEBUG)
+log = logging.getLogger(__name__)
+
+# Log columns read by run_audit; missing ones are filled with NaN so every
+# row exposes the same attributes.
+AUDIT_COLUMNS = ('action', 'principal', 'resource', 'purpose', 'log_id', 'timestamp',
+                 'request_timestamp', 'lab_result', 'clinical_note', 'billing_info')
+
+# Attribute-level read flags of read_phi entries
+ATTRIBUTE_COLUMNS = ('lab_result', 'clinical_note', 'billing_info')
+
+# Fields of a detected violation: the keys of the violation dicts, or the columns
+# of the DataFrame returned by run_audit(..., as_frame=True)
+VIOLATION_COLUMNS = ('RuleID', 'Principal', 'ObjectID', 'timestamp', 'resource')
+
+
+def _quote_atom(value):
+    """Quotes a value as a Prolog atom, escaping backslashes and single quotes."""
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _quote_atoms(values):
+    """Vectorized _quote_atom over a Series."""
+    escaped = values.astype(str).str.replace('\\', '\\\\', regex=False).str.replace("'", "\\'", regex=False)
+    return "'" + escaped + "'"
+
+
+def _read_phi_facts(group, request_dates):
+    return ("read_phi(" + _quote_atoms(group['principal']) + ", " + _quote_atoms(group['resource']) + ", "
+            + _quote_atoms(group['purpose']) + ", " + _quote_atoms(group['log_id']) + ")")
+
+
+def _request_access_facts(group, request_dates):
+    return ("request_access(" + _quote_atoms(group['principal']) + ", " + _quote_atoms(group['resource']) + ", "
+            + _quote_atoms(group['log_id']) + ", " + _quote_atoms(request_dates) + ")")
+
+
+def _request_deactivation_facts(group, request_dates):
+    return ("request_deactivation(" + _quote_atoms(group['principal']) + ", "
+            + _quote_atoms(group['log_id']) + ", " + _quote_atoms(request_dates) + ")")
+
+
+# Policy-trigger actions mapped to the builder of their Prolog facts. A builder
+# takes the log entries of that action and their formatted request dates and
+# returns a Series of fact strings. Support for a new action is added here.
+ACTION_FACT_BUILDERS = {
+    'read_phi': _read_phi_facts,
+    'request_access': _request_access_facts,
+    'request_deactivation': _request_deactivation_facts,
+}
+
+# Number of log entries audited per audit_batch/2 query
+AUDIT_BATCH_SIZE = 64
+
+# Number of log chunks handed to each worker by run_audit_parallel
+PARALLEL_CHUNKS_PER_WORKER = 4
 
 class Auditor:
     """
@@ -8,161 +75,322 @@ class Auditor:
     """
     def __init__(self, policy_file="policy.pl"):
         """Initializes the Prolog engine and loads the policy rules."""
+        self.policy_file = policy_file
         self.prolog = Prolog()
         self.prolog.consult(policy_file)
+        # Path of the temporary .pl file holding the consulted KB facts
+        self.kb_file = None
         print(f"Auditor initialized with policy '{policy_file}'.")
 
-    def _format_fact(self, row):
-        """Formats a row from the KB DataFrame into a Prolog fact string."""
-        # Filters out empty/NaN arguments for facts with arity < 3
-        args = [f"'{val}'" for val in [row.arg1, row.arg2, row.arg3] if pd.notna(val)]
-        return f"{row.fact_name}({','.join(args)})"
+    def _format_facts(self, kb_dataframe):
+        """
+        Formats every row of the KB DataFrame into a Prolog fact string.
+        Empty/NaN arguments are dropped, giving facts of arity < 3.
+
+        Returns:
+            tuple: (Series of fact strings, Series of fact arities)
+        """
+        arg_cols = ['arg1', 'arg2', 'arg3']
+        present = kb_dataframe[arg_cols].notna()
+        # Rows sharing the same set of present arguments are formatted with one
+        # concatenation each, so no per-row separator/where passes are needed
+        pattern = present.to_numpy() @ np.array([1, 2, 4])
+        facts = pd.Series(None, index=kb_dataframe.index, dtype=object)
+        for code in np.unique(pattern):
+            rows = pattern == code
+            group = kb_dataframe.loc[rows]
+            used = [col for bit, col in zip((1, 2, 4), arg_cols) if code & bit]
+            fact = group['fact_name'].astype(str) + '('
+            for k, col in enumerate(used):
+                fact = fact + (',' if k else '') + _quote_atoms(group[col])
+            facts.loc[rows] = (fact + ')').to_numpy()
+        return facts, present.sum(axis=1)
 
     def _decode_prolog_result(self, term):
         """
-        Safely decodes a term from pyswip if it's a byte string, 
+        Safely decodes a term from pyswip if it's a byte string or an Atom,
         otherwise returns it as is. This handles pyswip's inconsistent return types.
         """
         if isinstance(term, bytes):
             return term.decode('utf-8')
+        if isinstance(term, Atom):
+            return term.value
         return term
 
-    def _date_to_ymd(self, val):
+    def _build_action_facts(self, entries):
         """
-        Normalize a value to 'YYYY-MM-DD' string for Prolog facts.
-        Accepts pandas.Timestamp, datetime, ISO strings or None.
-        Returns None if the input is NaT/None/unparseable.
+        Builds the Prolog fact string for every log entry, one vectorized string
+        concatenation per action type through ACTION_FACT_BUILDERS. Entries whose
+        action is not a policy trigger get None.
         """
-        if pd.isna(val):
-            return None
-        if hasattr(val, 'strftime'):
-            return val.strftime('%Y-%m-%d')
-        try:
-            return pd.to_datetime(val).strftime('%Y-%m-%d')
-        except Exception:
-            return None
+        action_facts = pd.Series(None, index=entries.index, dtype=object)
+        # Format every request date in one vectorized pass, skipping rows that are
+        # not requests. Tolerates strings or Timestamps; unparseable dates become ''
+        is_request = entries['action'].astype(str).str.startswith('request_')
+        request_dates = (pd.to_datetime(entries['request_timestamp'].where(is_request), errors='coerce')
+                         .dt.strftime('%Y-%m-%d').fillna(''))
+        for action, group in entries.groupby('action', sort=False, observed=True):
+            build = ACTION_FACT_BUILDERS.get(action)
+            if build is None:
+                continue
+            action_facts.loc[group.index] = build(group, request_dates.loc[group.index]).to_numpy()
+        return action_facts
 
     def load_kb_facts(self, kb_dataframe):
-        """Asserts all facts from the Knowledge Base DataFrame into Prolog."""
-        for _, row in kb_dataframe.iterrows():
-            fact_string = self._format_fact(row)
-            self.prolog.assertz(fact_string)
+        """
+        Loads all facts from the Knowledge Base DataFrame into Prolog.
+
+        The facts are written to a temporary .pl file and consulted in one go,
+        so SWI-Prolog parses and indexes them natively instead of paying one
+        pyswip round-trip per assertz. The predicates are declared dynamic to
+        keep them retractable, as they were when asserted one by one.
+        """
+        facts, arities = self._format_facts(kb_dataframe)
+        predicates = (kb_dataframe['fact_name'].astype(str) + '/' + arities.astype(str)).unique()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.pl', prefix='ace_kb_', delete=False) as f:
+            for predicate in sorted(predicates):
+                f.write(f":- dynamic({predicate}).\n")
+            f.writelines(facts + '.\n')
+        self.kb_file = f.name
+        self.prolog.consult(self.kb_file)
+        # Tabled policy helpers must not keep answers computed against an older KB
+        list(self.prolog.query("abolish_all_tables"))
         print(f"Loaded {len(kb_dataframe)} facts into the Knowledge Base.")
+
+    def unload_kb_facts(self):
+        """Removes the facts loaded by load_kb_facts and deletes their temporary file."""
+        if self.kb_file is None:
+            return
+        list(self.prolog.query(f"unload_file({_quote_atom(self.kb_file)})"))
+        list(self.prolog.query("abolish_all_tables"))
+        os.remove(self.kb_file)
+        self.kb_file = None
     
-    def run_audit(self, log_dataframe, current_date_str):
+    def _prepare_entries(self, log_dataframe):
+        """
+        Projects the log onto the audited columns and builds the action facts.
+        Entries that cannot trigger any rule are left without a fact.
+
+        Returns:
+            tuple: (entries DataFrame, Series of action facts, whether the log
+            has a 'timestamp' column)
+        """
+        # Violations are stamped with the event time, falling back to the request time
+        # for logs (e.g. patient requests) that have no 'timestamp' column
+        has_timestamp = 'timestamp' in log_dataframe.columns
+        entries = log_dataframe.reindex(columns=AUDIT_COLUMNS).reset_index(drop=True)
+        action_facts = self._build_action_facts(entries)
+        # Entries that cannot trigger any rule never reach Prolog
+        candidates = self._violation_candidates(entries)
+        print(f"Skipping {int((action_facts.notna() & ~candidates).sum())} entries that cannot trigger any rule.")
+        action_facts[~candidates] = None
+        return entries, action_facts, has_timestamp
+
+    def _query_answers(self, goal, variable):
+        """Returns the set of decoded bindings of `variable` over all answers to `goal`."""
+        return {self._decode_prolog_result(answer[variable]) for answer in self.prolog.query(goal)}
+
+    def _query_tuples(self, goal, *variables):
+        """Returns the set of decoded binding tuples of `variables` over all answers to `goal`."""
+        return {tuple(self._decode_prolog_result(answer[variable]) for variable in variables)
+                for answer in self.prolog.query(goal)}
+
+    def _violation_candidates(self, entries):
+        """
+        Flags the entries that can trigger at least one violation rule against
+        the loaded KB. Mirrors the rule bodies in policy.pl: a read_phi entry
+        needs an unassigned doctor, a forbidden attribute read or a restricted
+        purpose; a request needs to be unfulfilled. The KB side is asked a few
+        small queries per log, and the read-side ones only when the log has
+        read_phi entries.
+
+        Returns:
+            pandas.Series: Boolean mask over the entries.
+        """
+        actions = entries['action']
+        principals = entries['principal'].astype(str)
+        resources = entries['resource'].astype(str)
+        purposes = entries['purpose'].astype(str)
+        log_ids = entries['log_id'].astype(str)
+        is_read = actions == 'read_phi'
+
+        read_candidates = pd.Series(False, index=entries.index)
+        if is_read.any():
+            # hipaa_auth: a doctor reading a record with an owner they are not assigned
+            # to. Only the assigned pairs are fetched (about one per record), instead of
+            # every unassigned doctor/record pair; a (doctor, record) pair is safe only
+            # when the doctor is assigned to every owner of the record
+            doctors = self._query_answers("has_role(D, doctor)", 'D')
+            owner_count = Counter(record for record, _ in self._query_tuples("owns_phi_record(P, R)", 'R', 'P'))
+            assigned = self._query_tuples("owns_phi_record(P, R), is_doctor_of(D, P)", 'D', 'R', 'P')
+            assigned_count = Counter((doctor, record) for doctor, record, _ in assigned)
+            fully_assigned = {f"{doctor}|{record}" for (doctor, record), count in assigned_count.items()
+                              if count == owner_count[record]}
+            read_candidates |= (principals.isin(doctors) & resources.isin(set(owner_count))
+                                & ~(principals + '|' + resources).isin(fully_assigned))
+            # hipaa_min_necessary: an attribute read that the principal's role forbids
+            for attr in ATTRIBUTE_COLUMNS:
+                forbidden = self._query_answers(f"role_forbids_attribute(P, _, {attr})", 'P')
+                read_candidates |= entries[attr].isin([1, '1', True]) & principals.isin(forbidden)
+            # gdpr_art18_restriction: the record is restricted for the entry's purpose
+            for purpose in purposes[is_read].unique():
+                restricted = self._query_answers(f"restricted_for_purpose(R, _, {_quote_atom(purpose)})", 'R')
+                read_candidates |= (purposes == purpose) & resources.isin(restricted)
+
+        # gdpr_art15_access / gdpr_art17_erasure: only unfulfilled requests can be late.
+        # Requests without a valid date are kept so the audit loop still reports them
+        access_done = self._query_answers("request_fulfilled(ID)", 'ID')
+        deactivation_done = self._query_answers("deactivation_fulfilled(ID)", 'ID')
+        missing_date = entries['request_timestamp'].isna()
+        return ((is_read & read_candidates)
+                | ((actions == 'request_access') & (~log_ids.isin(access_done) | missing_date))
+                | ((actions == 'request_deactivation') & (~log_ids.isin(deactivation_done) | missing_date)))
+
+    def _audit_batch(self, batch, found):
+        """
+        Audits a batch of entries with one audit_batch/2 query. Each entry's
+        facts are asserted, queried and retracted on the Prolog side.
+
+        Args:
+            batch (dict): Maps an entry's position in the log to its facts,
+                joined with ', ' (the body of a Prolog list).
+            found (list): The batch's raw [position, RuleID, Principal, ObjectID]
+                violations are appended to it, still undecoded.
+        """
+        goal_entries = ', '.join(f"{index}-[{facts}]" for index, facts in batch.items())
+        result = list(self.prolog.query(f"audit_batch([{goal_entries}], Violations)"))
+        found.extend(result[0]['Violations'])
+
+    def _audit_entries(self, entries, action_facts, has_timestamp, as_frame=False):
+        """
+        Audits the entries AUDIT_BATCH_SIZE at a time. Expects current_date/1
+        to be asserted already. Returns a list of violation dicts, or with
+        as_frame a DataFrame with the VIOLATION_COLUMNS.
+        """
+        # Pull the columns into plain arrays once; the loop indexes them by position
+        resources = entries['resource'].to_numpy()
+        is_request = entries['action'].astype(str).str.startswith('request_').to_numpy()
+        log_ids = entries['log_id'].to_numpy()
+        request_times = entries['request_timestamp'].to_numpy(dtype=object)
+        missing_request_time = entries['request_timestamp'].isna().to_numpy()
+        violation_times = entries['timestamp' if has_timestamp else 'request_timestamp'].to_numpy(dtype=object)
+        # Only actions that are policy triggers have a fact to audit; request facts
+        # whose parsed request timestamp is NaT are skipped. Both filters are applied
+        # up front, so the loop below only visits the entries that are audited.
+        has_fact = action_facts.notna().to_numpy()
+        missing_date = has_fact & is_request & missing_request_time
+        for i in np.flatnonzero(missing_date):
+            log.debug("Skipping assertion for %s due to missing/invalid request date: raw_value=%r",
+                      log_ids[i], request_times[i])
+        # Each entry's facts as the text of a Prolog list body: the action fact, and for
+        # read_phi events one read_attribute fact per attribute read (truthy 1 or '1').
+        # Built a column at a time, so the loop below formats no strings.
+        action_facts = action_facts.to_numpy(dtype=object)
+        entry_facts = action_facts.copy()
+        is_read_phi = (entries['action'] == 'read_phi').to_numpy() & has_fact
+        read_prefix = (", read_attribute(" + _quote_atoms(entries['principal']) + ", "
+                       + _quote_atoms(entries['resource']) + ", ").to_numpy(dtype=object)
+        for attr in ATTRIBUTE_COLUMNS:
+            reads = is_read_phi & entries[attr].isin([1, '1', True]).to_numpy()
+            entry_facts[reads] = entry_facts[reads] + read_prefix[reads] + f"{attr})"
+
+        # Raw violations of all batches; decoded and zipped into dicts at the end
+        found = []
+        batch = {}
+        for i in np.flatnonzero(has_fact & ~missing_date).tolist():
+            # Log the exact fact we'll assert for easier tracing
+            log.debug("Asserting fact: %s", action_facts[i])
+            batch[i] = entry_facts[i]
+            if len(batch) == AUDIT_BATCH_SIZE:
+                self._audit_batch(batch, found)
+                batch = {}
+
+        if batch:
+            self._audit_batch(batch, found)
+
+        if not found:
+            return pd.DataFrame(columns=VIOLATION_COLUMNS) if as_frame else []
+        positions, rule_ids, violators, object_ids = zip(*found)
+        # Decode each term column in a single pass over all batches
+        rule_ids, violators, object_ids = (map(self._decode_prolog_result, column)
+                                           for column in (rule_ids, violators, object_ids))
+        positions = np.array(positions, dtype=int)
+        if as_frame:
+            # Built straight from the columns, without a dict per violation
+            return pd.DataFrame(dict(zip(VIOLATION_COLUMNS, (list(rule_ids), list(violators), list(object_ids),
+                                                             violation_times[positions], resources[positions]))))
+        return [{'RuleID': rule_id, 'Principal': principal, 'ObjectID': object_id,
+                 'timestamp': timestamp, 'resource': resource}
+                for rule_id, principal, object_id, timestamp, resource
+                in zip(rule_ids, violators, object_ids, violation_times[positions], resources[positions])]
+
+    def run_audit(self, log_dataframe, current_date_str, as_frame=False):
         """
         Audits a given log DataFrame against the loaded KB and returns a
         list of all detected violations.
+
+        Args:
+            as_frame (bool): Return the violations as a DataFrame with one row
+                per violation and the VIOLATION_COLUMNS instead.
         """
-        all_violations = []
         print(f"Starting audit of {len(log_dataframe)} log entries...")
         
         # Assert the current date for the audit to ensure deterministic results
-        self.prolog.assertz(f"current_date('{current_date_str}')")
-
-        for _, entry in log_dataframe.iterrows():
-            action = entry['action']
-            action_fact = None
-
-            # --- UPDATED: Handles all action types from both logs ---
-            # if action == 'read_phi':
-            #     action_fact = (f"read_phi('{entry['principal']}', '{entry['resource']}', "
-            #                    f"'{entry['purpose']}', '{entry['log_id']}')")
-            # elif action == 'request_access':
-            #     # The resource column holds the PHI record ID for access requests
-            #     request_date = entry['request_timestamp'].strftime('%Y-%m-%d')
-            #     action_fact = (f"request_access('{entry['principal']}', '{entry['resource']}', "
-            #                    f"'{entry['log_id']}', '{request_date}')")
-            # elif action == 'request_deactivation':
-            #     request_date = entry['request_timestamp'].strftime('%Y-%m-%d')
-            #     action_fact = (f"request_deactivation('{entry['principal']}', "
-            #                    f"'{entry['log_id']}', '{request_date}')")
-            
-
-            if action == 'read_phi':
-                action_fact = (f"read_phi('{entry['principal']}', '{entry['resource']}', "
-                               f"'{entry['purpose']}', '{entry['log_id']}')")
-            elif action == 'request_access':
-                # Use helper to tolerate strings or Timestamps
-                request_date = self._date_to_ymd(entry.get('request_timestamp'))
-                request_date_str = request_date if request_date is not None else ''
-                action_fact = (f"request_access('{entry['principal']}', '{entry['resource']}', "
-                               f"'{entry['log_id']}', '{request_date_str}')")
-            elif action == 'request_deactivation':
-                request_date = self._date_to_ymd(entry.get('request_timestamp'))
-                request_date_str = request_date if request_date is not None else ''
-                action_fact = (f"request_deactivation('{entry['principal']}', "
-                               f"'{entry['log_id']}', '{request_date_str}')")
-
-
-            # If the action is a known trigger, assert it and query for violations
-            if action_fact:
-                # For request facts, skip if the parsed request timestamp is NaT
-                if action.startswith('request_'):
-                    parsed_dt = entry.get('request_timestamp')
-                    if pd.isna(parsed_dt):
-                        print(f"Skipping assertion for {entry.get('log_id')} due to missing/invalid request date: raw_value={entry.get('request_timestamp')!r}")
-                        continue
-
-                # Log the exact fact we'll assert for easier tracing
-                print(f"Asserting fact: {action_fact}")
-                self.prolog.assertz(action_fact)
-
-                # If this is a read_phi event, also assert attribute-level read facts
-                attribute_facts = []
-                if action == 'read_phi':
-                    # Map DataFrame columns to attribute atoms used in policy
-                    for col, attr in (('lab_result', 'lab_result'), ('clinical_note', 'clinical_note'), ('billing_info', 'billing_info')):
-                        try:
-                            val = entry.get(col)
-                        except Exception:
-                            val = None
-                        # treat truthy (1 or '1') as read
-                        if val in (1, '1', True):
-                            fact = f"read_attribute('{entry['principal']}', '{entry['resource']}', {attr})"
-                            attribute_facts.append(fact)
-                            try:
-                                self.prolog.assertz(fact)
-                            except Exception:
-                                # best-effort; continue if assertion fails
-                                pass
-
-                query_result = list(self.prolog.query("violation(RuleID, Principal, ObjectID)"))
-                
-                if query_result:
-                    for violation in query_result:
-                        # Safely decode all parts of the result into standard strings
-                        decoded_violation = {
-                            'RuleID': self._decode_prolog_result(violation['RuleID']),
-                            'Principal': self._decode_prolog_result(violation['Principal']),
-                            'ObjectID': self._decode_prolog_result(violation['ObjectID']),
-                            'timestamp': entry.get('timestamp') or entry.get('request_timestamp'),
-                            'resource': entry['resource']
-                        }
-                        all_violations.append(decoded_violation)
-                
-                # Retract any attribute-level facts we asserted for this entry
-                for af in attribute_facts:
-                    try:
-                        self.prolog.retractall(af)
-                    except Exception:
-                        try:
-                            self.prolog.retract(af)
-                        except Exception:
-                            pass
-
-                # Retract the temporary log entry fact to keep the state clean
-                # Use retractall to avoid quoting/arity fragility
-                try:
-                    self.prolog.retractall(action_fact)
-                except Exception:
-                    # Fallback to simple retract if retractall isn't available for the term
-                    try:
-                        self.prolog.retract(action_fact)
-                    except Exception:
-                        pass
+        self.prolog.assertz(f"current_date({_quote_atom(current_date_str)})")
+
+        entries, action_facts, has_timestamp = self._prepare_entries(log_dataframe)
+        all_violations = self._audit_entries(entries, action_facts, has_timestamp, as_frame)
 
         # Clean up the asserted date fact
-        self.prolog.retract(f"current_date('{current_date_str}')")
+        self.prolog.retract(f"current_date({_quote_atom(current_date_str)})")
+        print(f"Audit complete. Found {len(all_violations)} violation(s).")
+        return all_violations
+
+    def run_audit_parallel(self, log_dataframe, current_date_str, workers=None):
+        """
+        Audits a log like run_audit, but spreads the entries over a pool of
+        worker processes. Each worker runs its own Prolog engine with the policy
+        and the KB file consulted by load_kb_facts, so load_kb_facts must have
+        been called first. Violations are returned in log order.
+
+        Args:
+            workers (int): Number of worker processes; defaults to the CPU count.
+        """
+        if self.kb_file is None:
+            raise RuntimeError("load_kb_facts must be called before run_audit_parallel.")
+        workers = workers or os.cpu_count() or 1
+        print(f"Starting parallel audit of {len(log_dataframe)} log entries on {workers} worker(s)...")
+
+        entries, action_facts, has_timestamp = self._prepare_entries(log_dataframe)
+        # A few chunks per worker keeps the pool busy when chunks take uneven time
+        bounds = np.linspace(0, len(entries), workers * PARALLEL_CHUNKS_PER_WORKER + 1).astype(int)
+        chunks = [(entries.iloc[lo:hi], action_facts.iloc[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+        # Spawned (not forked) workers, so no process inherits this engine's state
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(self.policy_file, self.kb_file, current_date_str)) as pool:
+            results = pool.map(_audit_chunk, chunks, repeat(has_timestamp))
+            all_violations = [violation for chunk_violations in results for violation in chunk_violations]
+
         print(f"Audit complete. Found {len(all_violations)} violation(s).")
         return all_violations
+
+
+# Auditor owned by each run_audit_parallel worker process
+_worker_auditor = None
+
+
+def _init_worker(policy_file, kb_file, current_date_str):
+    """Process-pool initializer: loads the policy, the KB file and the audit date."""
+    global _worker_auditor
+    _worker_auditor = Auditor(policy_file)
+    _worker_auditor.prolog.consult(kb_file)
+    _worker_auditor.prolog.assertz(f"current_date({_quote_atom(current_date_str)})")
+
+
+def _audit_chunk(chunk, has_timestamp):
+    """Audits one (entries, action_facts) chunk in a worker process."""
+    entries, action_facts = chunk
+    return _worker_auditor._audit_entries(entries, action_facts, has_timestamp)
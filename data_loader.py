@@ -1,17 +1,151 @@
+import hashlib
+from pathlib import Path
+
 import pandas as pd
 
-def load_knowledge_base(filepath="knowledge_base.csv"):
+# Prefer pyarrow's multi-threaded CSV reader when it is installed; pyarrow also
+# lets write_table store a Parquet copy next to every generated CSV
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    CSV_ENGINE = 'pyarrow'
+    WRITE_PARQUET = True
+except ImportError:
+    CSV_ENGINE = 'c'
+    WRITE_PARQUET = False
+
+# Generated tables are written through a 1 MiB buffer instead of the default 8 KiB one
+WRITE_BUFFER = 1024 * 1024
+
+# Parquet schema metadata key holding the SHA-1 of the CSV a copy was written for
+CSV_DIGEST_KEY = b'ace_csv_sha1'
+
+# Low-cardinality log columns stored as categoricals: comparisons and group-bys
+# then work on small integer codes instead of hashing strings
+CATEGORICAL_COLUMNS = ('action', 'principal', 'purpose', 'resource')
+
+def _categorize(df):
+    """Converts the CATEGORICAL_COLUMNS present in a log DataFrame to category dtype."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def _parse_timestamps(series):
+    """
+    Parses a column of timestamp strings: one ISO8601 pass for the whole column,
+    then per-value format inference only for the non-ISO leftovers.
+    Unparseable values become NaT.
+    """
+    parsed = pd.to_datetime(series, format='ISO8601', errors='coerce', cache=True)
+    still_mask = parsed.isna() & series.notna()
+    if still_mask.any():
+        parsed.loc[still_mask] = pd.to_datetime(series[still_mask], format='mixed', errors='coerce')
+    return parsed
+
+def timestamp_text(series):
+    """
+    Formats a datetime column exactly like str(Timestamp) does value by value:
+    'YYYY-MM-DD HH:MM:SS', plus the fraction of a second only when it is not
+    zero (6 digits, or 9 with nanoseconds); NaT -> 'NaT'.
+    """
+    text = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+    micros = series.dt.microsecond.fillna(0).to_numpy() != 0
+    nanos = series.dt.nanosecond.fillna(0).to_numpy() != 0
+    if micros.any() or nanos.any():
+        fraction = series.dt.strftime('.%f')
+        fraction = fraction.where(~nanos, fraction + series.dt.nanosecond.fillna(0).astype(int).astype(str).str.zfill(3))
+        text = text.where(~(micros | nanos), text + fraction)
+    return text.fillna('NaT')
+
+def _read_table(filepath, columns=None, **csv_kwargs):
+    """
+    Reads a log or KB table. Paths ending in .parquet are read with
+    pd.read_parquet, which keeps the stored dtypes (e.g. datetime64) and skips
+    text parsing; anything else is read as CSV with csv_kwargs.
+    If columns is given, only those columns are read from the file.
+    """
+    if str(filepath).endswith('.parquet'):
+        return pd.read_parquet(filepath, columns=columns)
+    return pd.read_csv(filepath, engine=CSV_ENGINE, usecols=columns, **csv_kwargs)
+
+def _csv_digest(csv_path):
+    """Returns the hex SHA-1 of a CSV file's bytes, as stored under CSV_DIGEST_KEY."""
+    digest = hashlib.sha1()
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(WRITE_BUFFER), b''):
+            digest.update(chunk)
+    return digest.hexdigest().encode()
+
+def _write_parquet_copy(df, csv_path):
+    """Writes df next to csv_path as a .parquet copy tagged with the CSV's digest."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), CSV_DIGEST_KEY: _csv_digest(csv_path)})
+    pq.write_table(table, Path(csv_path).with_suffix('.parquet'), compression='zstd')
+
+def prefer_parquet(filepath):
+    """
+    Returns the .parquet copy written next to a CSV when it was written for the
+    CSV's current contents; otherwise returns filepath unchanged. The copy is
+    matched by the CSV digest in its metadata rather than by modification
+    times, which a checkout or copy does not preserve.
+    """
+    csv_path = Path(filepath)
+    parquet_path = csv_path.with_suffix('.parquet')
+    if not (WRITE_PARQUET and csv_path.suffix == '.csv' and parquet_path.exists() and csv_path.exists()):
+        return filepath
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    if metadata.get(CSV_DIGEST_KEY) == _csv_digest(csv_path):
+        return str(parquet_path)
+    return filepath
+
+def write_table(df, csv_path, parquet_df=None, **csv_kwargs):
     """
-    Loads the Knowledge Base facts from a CSV file.
+    Writes a generated table (the KB or a log) to a CSV file and, when pyarrow
+    is installed, a Parquet copy next to it for prefer_parquet to pick up.
+
+    Args:
+        df (pandas.DataFrame): The rows written to the CSV, without the index.
+        csv_path (str): Path of the CSV file; the copy gets the .parquet suffix.
+        parquet_df (pandas.DataFrame): Stored in the copy instead of df, e.g.
+            with parsed timestamps where the CSV holds formatted text.
+        **csv_kwargs: Passed on to DataFrame.to_csv (e.g. lineterminator).
+    """
+    with open(csv_path, 'w', newline='', buffering=WRITE_BUFFER) as f:
+        df.to_csv(f, index=False, **csv_kwargs)
+    if WRITE_PARQUET:
+        _write_parquet_copy(df if parquet_df is None else parquet_df, csv_path)
+
+def build_cache(filepath, loader=None):
+    """
+    Writes the .parquet copy of an existing CSV, e.g. after a checkout that
+    brought the CSV but not its (gitignored) copy. Loading stays read-only;
+    this is the explicit step that fills the cache. Needs pyarrow.
+
+    Args:
+        filepath (str): The path to the KB or log CSV file.
+        loader (callable): The load_* function for the file, so the copy stores
+            the dtypes it produces; load_knowledge_base by default.
+    """
+    df = (loader or load_knowledge_base)(filepath)
+    _write_parquet_copy(df, filepath)
+    print(f"Wrote {Path(filepath).with_suffix('.parquet')}")
+
+def load_knowledge_base(filepath="knowledge_base.csv", columns=None):
+    """
+    Loads the Knowledge Base facts from a CSV file, or from the .parquet copy
+    kb_generation.py or build_cache wrote for its current contents.
     
     Args:
-        filepath (str): The path to the knowledge_base.csv file.
+        filepath (str): The path to the knowledge_base.csv file (or a .parquet copy).
+        columns (list): Optional subset of columns to read; all columns by default.
     
     Returns:
         pandas.DataFrame: A DataFrame containing the knowledge base facts.
     """
     print(f"Loading Knowledge Base from {filepath}...")
-    return pd.read_csv(filepath)
+    # Keep the validity dates as strings; pyarrow would otherwise infer date objects
+    return _read_table(prefer_parquet(filepath), columns=columns, dtype={'start_date': str, 'end_date': str})
 
 def load_staff_log(filepath="staff_activity_log.csv"):
     """
@@ -19,18 +153,21 @@ def load_staff_log(filepath="staff_activity_log.csv"):
     timestamp column to a proper datetime object for calculations.
     
     Args:
-        filepath (str): The path to the staff_activity_log.csv file.
+        filepath (str): The path to the staff_activity_log.csv file (or a .parquet copy).
         
     Returns:
         pandas.DataFrame: A DataFrame containing the staff log events.
     """
     print(f"Loading Staff Activity Log from {filepath}...")
-    df = pd.read_csv(filepath)
+    # The pyarrow engine parses well-formed ISO timestamps natively
+    df = _read_table(filepath, parse_dates=['timestamp'])
     
-    # Robust parsing: let pandas infer ISO dates; invalid parse -> NaT
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    # Robust parsing: a column with invalid values is left as strings by the
+    # reader, so parse it here; invalid -> NaT
+    if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        df['timestamp'] = _parse_timestamps(df['timestamp'])
     
-    return df
+    return _categorize(df)
 
 def load_patient_log(filepath="patient_request_log.csv"):
     """
@@ -38,14 +175,14 @@ def load_patient_log(filepath="patient_request_log.csv"):
     timestamp columns to proper datetime objects.
     
     Args:
-        filepath (str): The path to the patient_request_log.csv file.
+        filepath (str): The path to the patient_request_log.csv file (or a .parquet copy).
         
     Returns:
         pandas.DataFrame: A DataFrame containing the patient request events.
     """
     print(f"Loading Patient Request Log from {filepath}...")
     # Read timestamps as raw strings to avoid pandas silently converting unusual tokens to NaN
-    df = pd.read_csv(filepath, dtype=str)
+    df = _read_table(filepath, dtype=str)
 
     # Restore numeric flag columns to integers if present
     for col in ('lab_result', 'clinical_note', 'billing_info'):
@@ -54,23 +191,14 @@ def load_patient_log(filepath="patient_request_log.csv"):
 
     # Normalize and parse timestamp columns robustly
     for ts_col in ('request_timestamp', 'process_timestamp'):
-        if ts_col in df.columns:
+        # Parquet logs already store parsed timestamps
+        if ts_col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[ts_col]):
             # Ensure string, strip whitespace and surrounding quotes
             df[ts_col] = df[ts_col].astype(str).str.strip()
             df[ts_col] = df[ts_col].str.strip('"').str.strip("'")
             # Convert obvious null-like strings to real NaN so to_datetime will coerce
             df[ts_col] = df[ts_col].replace({'nan': None, 'None': None, '': None})
-            # Try common ISO formats explicitly to handle microsecond and second-only cases reliably
-            series = df[ts_col]
-            parsed = pd.to_datetime(series, format='%Y-%m-%dT%H:%M:%S.%f', errors='coerce')
-            mask = parsed.isna()
-            if mask.any():
-                parsed2 = pd.to_datetime(series[mask], format='%Y-%m-%dT%H:%M:%S', errors='coerce')
-                parsed.loc[mask] = parsed2
-            # final fallback to pandas flexible parser
-            still_mask = parsed.isna()
-            if still_mask.any():
-                parsed.loc[still_mask] = pd.to_datetime(series[still_mask], errors='coerce')
-            df[ts_col] = parsed
+            # One ISO8601 pass handles both microsecond and second-only values
+            df[ts_col] = _parse_timestamps(df[ts_col])
 
-    return df
+    return _categorize(df)
@@ -1,13 +1,15 @@
+import numpy as np
 import pandas as pd
-from faker import Faker
-import random
 from datetime import datetime, timedelta
 
+import data_loader
+
 # --- 1. CONFIGURATION ---
 NUM_DOCTORS = 50
 NUM_PATIENTS = 2000
 NUM_BILLING_STAFF = 15
 START_DATE = datetime(2025, 1, 1)
+RANDOM_SEED = 0 # Fixed seed so regenerating the KB gives the same facts
 
 # Define principals with more realistic IDs
 DOCTORS = [f'doc_{i}' for i in range(NUM_DOCTORS)]
@@ -24,77 +26,83 @@ RESEARCH_RESTRICTED_PATIENT = "pat_25"
 
 # Define all possible data processing purposes
 PURPOSES = ['diagnosis', 'billing', 'research', 'marketing']
+# Essential purposes are consented by default; optional ones are drawn at random
+OPTIONAL_PURPOSES = ['research', 'marketing']
+CONSENT_RATE = 0.7 # 70% of patients consent to each optional purpose
 
 # --- 2. FACT GENERATION ---
 
-def generate_core_facts():
+def generate_core_facts(rng):
     """
     Generates foundational, stateful facts for the hospital: roles, relationships,
     data ownership, resource types, and role-based permissions.
+    The facts are assembled as column arrays and turned into one DataFrame.
     """
-    core_facts = []
     print("Generating core facts (roles, ownership, permissions)...")
     category_code = "CORE"
+    patients = np.array(list(PHI_RECORDS.keys()))
+    records = np.array(list(PHI_RECORDS.values()))
+    none_col = np.full(len(patients), None, dtype=object)
 
     # A. Roles for all principals
-    for doc in DOCTORS: core_facts.append({"category": category_code, "fact_name": "has_role", "arg1": doc, "arg2": "doctor", "arg3": None})
-    for pat in PATIENTS: core_facts.append({"category": category_code, "fact_name": "has_role", "arg1": pat, "arg2": "patient", "arg3": None})
-    for staff in BILLING_STAFF: core_facts.append({"category": category_code, "fact_name": "has_role", "arg1": staff, "arg2": "billing_clerk", "arg3": None})
-
-    # B. Relationships and Data Ownership
-    for patient, record in PHI_RECORDS.items():
-        doctor = random.choice(DOCTORS)
-        core_facts.append({"category": category_code, "fact_name": "is_doctor_of", "arg1": doctor, "arg2": patient, "arg3": None})
-        core_facts.append({"category": category_code, "fact_name": "owns_phi_record", "arg1": patient, "arg2": record, "arg3": None})
-        core_facts.append({"category": category_code, "fact_name": "is_phi", "arg1": record, "arg2": None, "arg3": None})
-        
+    role_principals = np.array(DOCTORS + PATIENTS + BILLING_STAFF)
+    roles = np.repeat(['doctor', 'patient', 'billing_clerk'], [len(DOCTORS), len(PATIENTS), len(BILLING_STAFF)])
+
+    # B. Relationships and Data Ownership: one (is_doctor_of, owns_phi_record, is_phi)
+    # triple per patient, interleaved patient by patient
+    doctor_assignments = rng.choice(DOCTORS, size=len(patients))
+    relation_names = np.tile(['is_doctor_of', 'owns_phi_record', 'is_phi'], len(patients))
+    relation_arg1 = np.column_stack([doctor_assignments, patients, records]).ravel()
+    relation_arg2 = np.column_stack([patients.astype(object), records.astype(object), none_col]).ravel()
+
     # C. Role Permissions (for 'Minimum Necessary' rule)
     # Note: we no longer generate per-record 'resource_type' facts here.
     # Permissions (which roles can access which attribute types) are still defined below.
-    core_facts.append({"category": category_code, "fact_name": "role_can_access_type", "arg1": "doctor", "arg2": "clinical_note", "arg3": None})
-    core_facts.append({"category": category_code, "fact_name": "role_can_access_type", "arg1": "doctor", "arg2": "lab_result", "arg3": None})
-    core_facts.append({"category": category_code, "fact_name": "role_can_access_type", "arg1": "billing_clerk", "arg2": "billing_info", "arg3": None})
-        
-    return core_facts
-
-def generate_consent_facts():
+    permission_roles = ['doctor', 'doctor', 'billing_clerk']
+    permission_types = ['clinical_note', 'lab_result', 'billing_info']
+
+    fact_name = np.concatenate([np.full(len(role_principals), 'has_role'), relation_names,
+                                np.full(len(permission_roles), 'role_can_access_type')])
+    return pd.DataFrame({
+        "category": category_code,
+        "fact_name": fact_name,
+        "arg1": np.concatenate([role_principals, relation_arg1, permission_roles]),
+        "arg2": np.concatenate([roles.astype(object), relation_arg2, np.array(permission_types, dtype=object)]),
+        "arg3": None,
+    })
+
+def generate_consent_facts(rng):
     """
     Generates a complete consent profile for every patient across all purposes.
+    The optional-purpose consents are drawn in a single vectorized call.
     """
-    consent_facts = []
     print("Generating personal consent facts for all purposes...")
     category_code = "CONSENT"
-    
-    for patient in PATIENTS:
-        for purpose in PURPOSES:
-            # Essential purposes are consented by default
-            if purpose in ['diagnosis', 'billing']:
-                consent_facts.append({"category": category_code, "fact_name": "has_unrestricted_status", "arg1": patient, "arg2": purpose, "arg3": None})
-                continue
-
-            # Handle the specific test case for research restriction
-            if patient == RESEARCH_RESTRICTED_PATIENT and purpose == 'research':
-                consent_facts.append({"category": category_code, "fact_name": "has_restriction", "arg1": patient, "arg2": "research", "arg3": None})
-                continue
-            
-            # For optional purposes, generate random consent
-            if random.random() < 0.7: # 70% of patients consent to optional purposes
-                consent_facts.append({"category": category_code, "fact_name": "has_unrestricted_status", "arg1": patient, "arg2": purpose, "arg3": None})
-            else:
-                consent_facts.append({"category": category_code, "fact_name": "has_restriction", "arg1": patient, "arg2": purpose, "arg3": None})
-
-    return consent_facts
+
+    # consented[i, j]: patient i has unrestricted status for PURPOSES[j]
+    consented = np.ones((NUM_PATIENTS, len(PURPOSES)), dtype=bool)
+    optional_cols = [PURPOSES.index(purpose) for purpose in OPTIONAL_PURPOSES]
+    consented[:, optional_cols] = rng.random((NUM_PATIENTS, len(optional_cols))) < CONSENT_RATE
+
+    # Handle the specific test case for research restriction
+    consented[PATIENTS.index(RESEARCH_RESTRICTED_PATIENT), PURPOSES.index('research')] = False
+
+    # One row per (patient, purpose), patient-major as before
+    return pd.DataFrame({
+        "category": category_code,
+        "fact_name": np.where(consented.ravel(), "has_unrestricted_status", "has_restriction"),
+        "arg1": np.repeat(PATIENTS, len(PURPOSES)),
+        "arg2": np.tile(PURPOSES, NUM_PATIENTS),
+        "arg3": None,
+    })
 
 # --- 3. MAIN EXECUTION ---
 if __name__ == "__main__":
-    Faker.seed(0)
-    random.seed(0)
+    # All random draws come from this one seeded generator
+    rng = np.random.default_rng(RANDOM_SEED)
     
     # Generate facts from all categories
-    all_facts = generate_core_facts() + generate_consent_facts()
-
-    # Create a DataFrame
-    kb_df = pd.DataFrame(all_facts)
+    kb_df = pd.concat([generate_core_facts(rng), generate_consent_facts(rng)], ignore_index=True)
     
     # Add a unique KB_id as the first column
     kb_df.insert(0, 'kb_id', range(1, len(kb_df) + 1))
@@ -106,8 +114,8 @@ if __name__ == "__main__":
     # Reorder columns for clarity
     kb_df = kb_df[['kb_id', 'category', 'fact_name', 'arg1', 'arg2', 'arg3', 'start_date', 'end_date']]
 
-    # Save to CSV
-    kb_df.to_csv("knowledge_base/knowledge_base.csv", index=False)
+    # Save to CSV, plus a Parquet copy when pyarrow is installed
+    data_loader.write_table(kb_df, "knowledge_base/knowledge_base.csv")
 
     print(f"\n--- Hospital Knowledge Base Generation Complete ---")
     print(f"Generated {len(kb_df)} facts across 2 categories and saved to 'knowledge_base.csv'.")
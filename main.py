@@ -1,6 +1,6 @@
 import pandas as pd
 import data_loader
-from auditor import Auditor
+from auditor import Auditor, VIOLATION_COLUMNS
 from scorer import ComplianceScorer
 
 # --- 1. CONFIGURATION ---
@@ -9,6 +9,8 @@ KB_FILE = "knowledge_base/knowledge_base.csv"
 STAFF_LOG_FILE = "system_log/staff_activity_10000.csv"
 PATIENT_LOG_FILE = "system_log/patient_request_10000.csv"
 AUDIT_DATE = "2025-08-31"
+# The Auditor only turns fact_name and its arguments into Prolog facts
+KB_COLUMNS = ['fact_name', 'arg1', 'arg2', 'arg3']
 
 # Scoring model parameters
 SCORING_WEIGHTS = {'C': 0.4, 'V': 0.3, 'T': 0.2, 'B': 0.1}
@@ -22,6 +24,12 @@ RULE_CRITICALITIES = {
     'gdpr_art15_access': 0.7
 }
 
+# Fact asserted for a request action once it has been fulfilled in time
+FULFILLMENT_FACTS = {
+    'request_access': 'request_fulfilled',
+    'request_deactivation': 'deactivation_fulfilled'
+}
+
 # --- 2. Pre-processing function for patient request log ---
 def preprocess_log_to_generate_facts(patient_log_df, audit_date_str):
     """
@@ -30,37 +38,33 @@ def preprocess_log_to_generate_facts(patient_log_df, audit_date_str):
     fulfilled if the processing happened within the 30-day time limit.
     """
     print("Pre-processing patient log to identify fulfilled requests...")
-    fulfilled_facts = []
+
+    # Nothing to derive when no request has been processed at all
+    processed = patient_log_df['process_timestamp'].notna()
+    if not processed.any():
+        print("No timely fulfillment events found in patient log.")
+        return pd.DataFrame()
     
     # Consider only fulfillments that occurred on-or-before the audit date
     audit_date = pd.to_datetime(audit_date_str)
 
-    # Create mappings from request_id to request details for efficient lookup
-    requests_df = patient_log_df[patient_log_df['action'].isin(['request_access', 'request_deactivation'])].copy()
-    requests_df.set_index('log_id', inplace=True)
-
-    fulfillments_df = patient_log_df[patient_log_df['process_timestamp'].notna()].copy()
+    fulfillments_df = patient_log_df[processed]
     fulfillments_df = fulfillments_df[fulfillments_df['process_timestamp'] <= audit_date]
 
-    for _, req in fulfillments_df.iterrows():
-        request_id = req['log_id']
-        # Ensure request_timestamp exists
-        if pd.isna(req.get('request_timestamp')):
-            continue
-
-        # Check if the fulfillment was timely (processed within 30 days of request)
-        time_delta = req['process_timestamp'] - req['request_timestamp']
-
-        if time_delta.days <= 30:
-            action = req['action']
-            if action == 'request_access':
-                fulfilled_facts.append({"fact_name": "request_fulfilled", "arg1": request_id, "arg2": None, "arg3": None})
-            elif action == 'request_deactivation':
-                fulfilled_facts.append({"fact_name": "deactivation_fulfilled", "arg1": request_id, "arg2": None, "arg3": None})
-    
-    if fulfilled_facts:
-        print(f"Found and generated {len(fulfilled_facts)} timely fulfillment facts.")
-        return pd.DataFrame(fulfilled_facts)
+    # A fulfillment is timely if processed within 30 days of the request; rows
+    # without a request_timestamp give NaT deltas and are dropped by the comparison
+    time_delta = fulfillments_df['process_timestamp'] - fulfillments_df['request_timestamp']
+    timely = fulfillments_df[time_delta.dt.days <= 30]
+
+    # Map each request action to the fact that marks it fulfilled, keeping log order
+    fact_names = timely['action'].astype(str).map(FULFILLMENT_FACTS)
+    request_ids = timely['log_id'][fact_names.notna()]
+    fact_names = fact_names.dropna()
+
+    if len(fact_names):
+        print(f"Found and generated {len(fact_names)} timely fulfillment facts.")
+        return pd.DataFrame({"fact_name": fact_names.to_numpy(), "arg1": request_ids.to_numpy(),
+                             "arg2": None, "arg3": None})
     else:
         print("No timely fulfillment events found in patient log.")
         return pd.DataFrame()
@@ -120,7 +124,7 @@ def print_violation_log_entries(violations, staff_log_df, patient_log_df):
 # --- 3. Main orchestration script ---
 def main():
     # --- Load Data and Print Summary ---
-    kb_df = data_loader.load_knowledge_base(KB_FILE)
+    kb_df = data_loader.load_knowledge_base(KB_FILE, columns=KB_COLUMNS)
     staff_log_df = data_loader.load_staff_log(STAFF_LOG_FILE)
     patient_log_df = data_loader.load_patient_log(PATIENT_LOG_FILE)
     
@@ -141,8 +145,12 @@ def main():
     ace_auditor.load_kb_facts(kb_df)
     
     # Audit both logs and combine the results
-    staff_violations = ace_auditor.run_audit(staff_log_df, AUDIT_DATE)
-    patient_violations = ace_auditor.run_audit(patient_log_df, AUDIT_DATE)
+    try:
+        staff_violations = ace_auditor.run_audit(staff_log_df, AUDIT_DATE)
+        patient_violations = ace_auditor.run_audit(patient_log_df, AUDIT_DATE)
+    finally:
+        # Delete the temporary KB file written by load_kb_facts
+        ace_auditor.unload_kb_facts()
     all_detected_violations = staff_violations + patient_violations
 
     # Print original log entries for each detected violation to aid debugging
@@ -152,7 +160,9 @@ def main():
     scorer = ComplianceScorer(SCORING_WEIGHTS, NORMALIZATION_CONSTANTS, RULE_CRITICALITIES)
 
     # --- Summarize Violations and Print Results ---
-    violations_df = pd.DataFrame(all_detected_violations) if all_detected_violations else pd.DataFrame()
+    # Columns given up front: pandas takes each record's fields in that order instead of
+    # inferring them from the union of the dicts' keys (and an empty audit keeps the columns)
+    violations_df = pd.DataFrame.from_records(all_detected_violations, columns=VIOLATION_COLUMNS)
     
     print("\n--- OVERALL AUDIT SUMMARY ---")
     if violations_df.empty:
@@ -160,14 +170,10 @@ def main():
     else:
         num_violators = violations_df['Principal'].nunique()
         print(f"Total violations detected: {len(violations_df)}")
-        # Also report unique violating rows (group by principal+object+timestamp)
-        try:
-            violations_df['row_key'] = violations_df.apply(lambda r: f"{r['Principal']}|{r['ObjectID']}|{r['timestamp']}", axis=1)
-            num_unique_rows = violations_df['row_key'].nunique()
-            print(f"Total unique violating rows: {num_unique_rows}")
-        except Exception:
-            # If timestamp formatting or keys fail, skip the unique-row summary
-            pass
+        # Also report unique violating rows (group by principal+object+timestamp); count
+        # distinct key-column combinations directly instead of building per-row key strings
+        num_unique_rows = len(violations_df.drop_duplicates(['Principal', 'ObjectID', 'timestamp']))
+        print(f"Total unique violating rows: {num_unique_rows}")
         print(f"Number of unique violators: {num_violators}")
         print("\nViolation Breakdown by Rule:")
         print(violations_df['RuleID'].value_counts().to_string())
@@ -179,15 +185,19 @@ def main():
     if not principals_to_evaluate:
         print("No violators to analyze.")
     else:
+        # Hand the scorer the violations DataFrame built above, shared by all principals
+        scorer.set_violations(violations_df)
+        # Count every principal's violations per rule in a single pass
+        rule_counts = violations_df.groupby('Principal', sort=False)['RuleID'].value_counts()
         for principal in principals_to_evaluate:
             print(f"\n--- Evaluating Principal: {principal} ---")
             
-            final_score = scorer.calculate_final_score(all_detected_violations, principal_id=principal)
+            # None: score the violations handed over by set_violations above
+            final_score = scorer.calculate_final_score(None, principal)
             print(f"Final Compliance Score: {final_score:.4f}")
             
             print("Violation Instances:")
-            principal_violations = violations_df[violations_df['Principal'] == principal]
-            print(principal_violations['RuleID'].value_counts().to_string())
+            print(rule_counts.loc[principal].to_string())
 
 if __name__ == "__main__":
     main()
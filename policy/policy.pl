@@ -25,6 +25,39 @@ days_since(StartDateString, EndDateString, Days) :-
     Days is floor(DaysFloat).
 
 
+% --- TABLED KNOWLEDGE BASE HELPERS ---
+% These helpers only depend on Knowledge Base facts, which stay fixed while a
+% log is audited, so their answers are tabled and reused across log entries
+% instead of re-running the same joins for every entry. They never look at
+% the per-entry log facts, so no table needs to be abolished when an entry is
+% retracted; the Auditor abolishes all tables whenever the KB is (re)loaded.
+% The Auditor also queries them directly to skip log entries that cannot
+% trigger any rule, so keep auditor.py in step when a rule body changes.
+% A table holds each answer once, so every helper keeps the Patient or Role
+% its join ran over: a record with two owners, or a principal with two
+% forbidding roles, still gives one violation per owner or role, as the
+% untabled rule bodies did.
+:- table unassigned_doctor_of_record/3.
+:- table role_forbids_attribute/3.
+:- table restricted_for_purpose/3.
+
+% Doctor is a doctor and Patient owns the record but is not assigned to them.
+unassigned_doctor_of_record(Doctor, Patient, PHI_Record) :-
+    has_role(Doctor, 'doctor'),
+    owns_phi_record(Patient, PHI_Record),
+    \+ is_doctor_of(Doctor, Patient).
+
+% Role is one of Principal's roles and is not permitted to access Attribute.
+role_forbids_attribute(Principal, Role, Attribute) :-
+    has_role(Principal, Role),
+    \+ role_can_access_type(Role, Attribute).
+
+% Patient owns the record and has no unrestricted status for Purpose.
+restricted_for_purpose(PHI_Record, Patient, Purpose) :-
+    owns_phi_record(Patient, PHI_Record),
+    \+ has_unrestricted_status(Patient, Purpose).
+
+
 % --- COMPLIANCE VIOLATION RULES ---
 % A violation is a predicate of the form:
 % violation(RuleID, Principal, OffendingObjectID)
@@ -34,9 +67,7 @@ days_since(StartDateString, EndDateString, Days) :-
 % patient they are not formally assigned to in the Knowledge Base.
 violation('hipaa_auth', Doctor, PHI_Record) :-
     read_phi(Doctor, PHI_Record, _Purpose, _EventID),
-    has_role(Doctor, 'doctor'),
-    owns_phi_record(Patient, PHI_Record),
-    \+ is_doctor_of(Doctor, Patient).
+    unassigned_doctor_of_record(Doctor, _Patient, PHI_Record).
 
 % --- Rule 2: Minimum Necessary Violation (HIPAA-style) ---
 % A violation occurs if a principal's role does not permit them to
@@ -55,17 +86,15 @@ violation('hipaa_auth', Doctor, PHI_Record) :-
 % specific attribute contained in the record that they actually read.
 violation('hipaa_min_necessary', Principal, PHI_Record) :-
     read_phi(Principal, PHI_Record, _Purpose, _EventID),
-    has_role(Principal, Role),
     read_attribute(Principal, PHI_Record, Attribute),
-    \+ role_can_access_type(Role, Attribute).
+    role_forbids_attribute(Principal, _Role, Attribute).
 
 % --- Rule 3: GDPR Art. 18 (Restriction of Processing) ---
 % A violation occurs if a patient's record is used for a 'Purpose'
 % for which the patient does not have an 'unrestricted_status'.
 violation('gdpr_art18_restriction', Principal, PHI_Record) :-
     read_phi(Principal, PHI_Record, Purpose, _EventID),
-    owns_phi_record(Patient, PHI_Record),
-    \+ has_unrestricted_status(Patient, Purpose).
+    restricted_for_purpose(PHI_Record, _Patient, Purpose).
 
 % --- Rule 4: GDPR Art. 17 (Right to Erasure) ---
 % A violation occurs if a deactivation request from a patient is older
@@ -109,4 +138,23 @@ violation('gdpr_art15_access', Doctor, RequestID) :-
     current_date(Today),
     days_since(RequestDate, Today, Days),
     Days > 30,
-    \+ request_fulfilled(RequestID).
\ No newline at end of file
+    \+ request_fulfilled(RequestID).
+
+
+% --- BATCHED AUDIT DRIVER ---
+% audit_batch(+Entries, -Violations) audits several log entries in a single
+% call from Python. Entries is a list of Index-Facts pairs, one per log entry.
+% Each entry's facts are asserted on their own, checked against violation/3
+% and retracted again, so every entry is judged exactly as if it had been
+% audited alone. Violations is a list of [Index, RuleID, Principal, ObjectID].
+audit_batch(Entries, Violations) :-
+    findall([Index, RuleID, Principal, ObjectID],
+            ( member(Index-Facts, Entries),
+              entry_violation(Facts, RuleID, Principal, ObjectID) ),
+            Violations).
+
+entry_violation(Facts, RuleID, Principal, ObjectID) :-
+    setup_call_cleanup(maplist(assertz, Facts),
+                       findall(v(R, P, O), violation(R, P, O), Found),
+                       maplist(retract, Facts)),
+    member(v(RuleID, Principal, ObjectID), Found).
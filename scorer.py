@@ -18,11 +18,49 @@ class ComplianceScorer:
         self.weights = weights
         self.k = normalization_constants
         self.rule_criticalities = rule_criticalities
+        # Violations DataFrame and evaluation end date, set by prime()/set_violations()
+        self._violations_df = None
+        self._end_date = None
+        # Every principal's score per time window, cleared on new violations
+        self._window_scores = {}
         print("Compliance Scorer initialized.")
 
     def _normalize(self, value, k_const):
         """Applies the negative exponential normalization from Definition 3.8."""
-        return 1 - np.exp(-k_const * float(value))
+        return 1 - np.exp(-k_const * np.asarray(value, dtype=float))
+
+    def prime(self, violations):
+        """
+        Converts the violations from the Auditor into a DataFrame once, so that
+        scoring several principals does not rebuild it on every call.
+
+        Args:
+            violations (list): A list of violation dictionaries from the Auditor.
+        """
+        self.set_violations(pd.DataFrame(violations))
+
+    def set_violations(self, violations_df):
+        """
+        Uses an already built violations DataFrame (one row per violation from
+        the Auditor) for the following calculate_final_score calls.
+
+        Args:
+            violations_df (pandas.DataFrame): Violations with at least the
+                'Principal', 'RuleID', 'resource' and 'timestamp' columns.
+        """
+        if violations_df.empty:
+            self._violations_df = violations_df
+            self._end_date = None
+        else:
+            # Keep only the columns the scoring reads; Principal and RuleID are few
+            # distinct values, so the groupbys run on category codes
+            self._violations_df = pd.DataFrame({
+                'Principal': violations_df['Principal'].astype('category'),
+                'RuleID': violations_df['RuleID'].astype('category'),
+                'resource': violations_df['resource'],
+                'timestamp': pd.to_datetime(violations_df['timestamp'], cache=True)})
+            self._end_date = self._violations_df['timestamp'].max()
+        self._window_scores.clear()
 
     def calculate_final_score(self, violations, principal_id, time_window_days=30):
         """
@@ -30,59 +68,68 @@ class ComplianceScorer:
         'worst-offense' approach from Definition 3.10.
         
         Args:
-            violations (list): A list of violation dictionaries from the Auditor.
+            violations (list): A list of violation dictionaries from the Auditor;
+                it is converted again on every call. Pass None to score the
+                violations given to prime() or set_violations(), whose scores
+                are computed once and reused across principals.
             principal_id (str): The ID of the principal to score.
             time_window_days (int): The look-back period for the evaluation.
             
         Returns:
             float: The final compliance score, bounded between 0.0 and 1.0.
         """
-        if not violations:
-            return 1.0 # Perfect compliance if there are no violations at all
+        if violations is not None:
+            self.prime(violations)
+        # Principals without violations in the window have perfect compliance
+        return float(self._scores_for_window(time_window_days).get(principal_id, 1.0))
 
-        violations_df = pd.DataFrame(violations)
-        
-        # Filter for the specific principal and time window
-        end_date = violations_df['timestamp'].max()
-        start_date = end_date - pd.Timedelta(days=time_window_days)
-        principal_violations = violations_df[
-            (violations_df['Principal'] == principal_id) &
-            (violations_df['timestamp'] >= start_date)
-        ]
-
-        if principal_violations.empty:
-            return 1.0 # Perfect compliance for this principal in this window
-
-        # Group individual violations by rule to form "Violation Instances" (Def 3.6)
-        grouped = principal_violations.groupby('RuleID')
-        
-        max_severity = 0.0
-
-        for rule_id, group in grouped:
-            # 1. Calculate Magnitude Metrics (Def 3.6)
-            volume = group['resource'].nunique()
-            duration = (group['timestamp'].max() - group['timestamp'].min()).days + 1
-            # Note: A full implementation of Breadth would require joining with the
-            # Knowledge Base to get resource types. For this script, we simplify
-            # it to 1, representing a single category of violation.
-            breadth = 1 
-
-            # 2. Normalize Components (Def 3.8)
-            s_v = self._normalize(volume, self.k['V'])
-            s_t = self._normalize(duration, self.k['T'])
-            s_b = self._normalize(breadth, self.k['B'])
-            criticality = self.rule_criticalities.get(rule_id, 0.5) # Default criticality
-
-            # 3. Calculate Violation Severity Score (Def 3.9)
-            severity_score = (self.weights['C'] * criticality +
-                              self.weights['V'] * s_v +
-                              self.weights['T'] * s_t +
-                              self.weights['B'] * s_b)
-            
-            if severity_score > max_severity:
-                max_severity = severity_score
+    def _scores_for_window(self, time_window_days):
+        """Returns the scores of _compute_window_scores, computed once per time window."""
+        if time_window_days not in self._window_scores:
+            self._window_scores[time_window_days] = self._compute_window_scores(time_window_days)
+        return self._window_scores[time_window_days]
+
+    def _compute_window_scores(self, time_window_days):
+        """
+        Scores every principal in the primed violations at once for the given
+        time window (see calculate_final_score).
+
+        Returns:
+            pandas.Series: Compliance scores indexed by Principal.
+        """
+        if self._violations_df is None or self._violations_df.empty:
+            return pd.Series(dtype=float) # Perfect compliance if there are no violations at all
+
+        # Filter for the time window
+        start_date = self._end_date - pd.Timedelta(days=time_window_days)
+        recent = self._violations_df[self._violations_df['timestamp'] >= start_date]
+
+        # Group individual violations by principal and rule to form "Violation Instances" (Def 3.6)
+        # 1. Calculate Magnitude Metrics (Def 3.6), for all instances in one aggregation
+        instances = recent.groupby(['Principal', 'RuleID'], observed=True).agg(
+            volume=('resource', 'nunique'), first_seen=('timestamp', 'min'), last_seen=('timestamp', 'max'))
+        volume = instances['volume'].to_numpy()
+        duration = (instances['last_seen'] - instances['first_seen']).dt.days.to_numpy() + 1
+        # Note: A full implementation of Breadth would require joining with the
+        # Knowledge Base to get resource types. For this script, we simplify
+        # it to 1, representing a single category of violation.
+        breadth = np.ones(len(instances))
+
+        # 2. Normalize Components (Def 3.8)
+        s_v = self._normalize(volume, self.k['V'])
+        s_t = self._normalize(duration, self.k['T'])
+        s_b = self._normalize(breadth, self.k['B'])
+        rule_ids = instances.index.get_level_values('RuleID').astype(object)
+        criticality = rule_ids.map(self.rule_criticalities).fillna(0.5).to_numpy(dtype=float) # Default criticality
+
+        # 3. Calculate Violation Severity Score (Def 3.9) of every instance
+        severity_scores = pd.Series(self.weights['C'] * criticality +
+                                    self.weights['V'] * s_v +
+                                    self.weights['T'] * s_t +
+                                    self.weights['B'] * s_b, index=instances.index)
+        max_severity = severity_scores.groupby(level='Principal', observed=True).max().clip(lower=0.0)
 
         # 4. Compute Final Principal Compliance Score (Def 3.10)
         compliance_score = 1.0 - max_severity
-        
-        return max(0.0, compliance_score) # Ensure score is not negative
+
+        return compliance_score.clip(lower=0.0) # Ensure score is not negative
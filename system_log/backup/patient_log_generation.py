@@ -1,15 +1,16 @@
+import numpy as np
 import pandas as pd
-from faker import Faker
-import random
 from datetime import datetime, timedelta
 
+import data_loader
+
 # --- 1. CONFIGURATION (with Personalization) ---
 NUM_REQUESTS = 50
 VIOLATION_RATE = 0.5 # Target violation rate (e.g., 50% of requests will be fulfilled late)
 START_DATE = datetime(2025, 1, 1)
 END_DATE = datetime(2025, 8, 30)
 # Entities
-PATIENTS = [f'pat_{i}' for i in range(20)]
+PATIENTS = tuple(f'pat_{i}' for i in range(20))
 PHI_RECORDS = {f'pat_{i}': f'phi_rec_{i}' for i in range(20)}
 # Special Principals
 UNFULFILLED_ACCESS_PATIENT = "pat_15"
@@ -34,8 +35,7 @@ def create_request_entry(log_id, principal, action, resource, req_time, proc_tim
 
 # --- 2. SCENARIO GENERATION ---
 if __name__ == "__main__":
-    Faker.seed(0)
-    random.seed(0)
+    rng = np.random.default_rng(0)
     all_request_entries = []
     log_counter = 0
 
@@ -68,32 +68,49 @@ if __name__ == "__main__":
     # --- Generate other random requests ---
     num_other_requests = NUM_REQUESTS - len(all_request_entries)
     print(f"Generating {num_other_requests} other random request entries...")
-    for i in range(num_other_requests):
-        patient = random.choice(PATIENTS)
-        req_time = Faker().date_time_between(start_date=START_DATE, end_date=END_DATE - timedelta(days=40))
-        
-        # Randomly choose which attributes the patient requests
-        num_attrs_requested = random.randint(1, len(REQUESTABLE_ATTRIBUTES))
-        requested_attrs = random.sample(REQUESTABLE_ATTRIBUTES, num_attrs_requested)
-        
-        # Use VIOLATION_RATE to determine if the request is fulfilled late
-        if random.random() < VIOLATION_RATE:
-            proc_time = req_time + timedelta(days=random.randint(31, 60))
-            label = "violation_gdpr_art15"
-        else:
-            proc_time = req_time + timedelta(days=random.randint(1, 29))
-            label = "benign"
-        
-        all_request_entries.append(create_request_entry(
-            f"req_{log_counter}", patient, "request_access", PHI_RECORDS[patient],
-            req_time, proc_time, label, requested_attrs
-        )); log_counter += 1
+    # Patient ids and their PHI records as parallel arrays, so each request takes
+    # both from one drawn index instead of a PHI_RECORDS lookup per row
+    patient_ids = np.array(PATIENTS)
+    patient_records = np.array([PHI_RECORDS[patient] for patient in PATIENTS])
+    patient_idx = rng.integers(len(PATIENTS), size=num_other_requests)
+    span_seconds = int((END_DATE - timedelta(days=40) - START_DATE).total_seconds())
+    req_time = pd.Timestamp(START_DATE) + pd.to_timedelta(rng.integers(span_seconds + 1, size=num_other_requests), unit='s')
+
+    # Randomly choose which attributes the patient requests: a random number of
+    # them, taken from a random ordering of REQUESTABLE_ATTRIBUTES per request
+    num_attrs_requested = rng.integers(1, len(REQUESTABLE_ATTRIBUTES) + 1, size=num_other_requests)
+    attr_rank = rng.permuted(np.tile(np.arange(len(REQUESTABLE_ATTRIBUTES)), (num_other_requests, 1)), axis=1)
+    requested = attr_rank < num_attrs_requested[:, None]
+
+    # Use VIOLATION_RATE to determine if the request is fulfilled late
+    late = rng.random(num_other_requests) < VIOLATION_RATE
+    delay_days = np.where(late, rng.integers(31, 61, size=num_other_requests), rng.integers(1, 30, size=num_other_requests))
+    proc_time = req_time + pd.to_timedelta(delay_days, unit='D')
+
+    # Same columns as create_request_entry
+    other_requests_df = pd.DataFrame({
+        "log_id": "req_" + np.arange(log_counter, log_counter + num_other_requests).astype(str).astype(object),
+        "principal": patient_ids[patient_idx], "action": "request_access",
+        "resource": patient_records[patient_idx],
+        **{attr: requested[:, i].astype(int) for i, attr in enumerate(REQUESTABLE_ATTRIBUTES)},
+        "request_timestamp": req_time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "process_timestamp": proc_time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "label": np.where(late, "violation_gdpr_art15", "benign")
+    })
+    log_counter += num_other_requests
 
     # --- Finalize and Save ---
-    log_df = pd.DataFrame(all_request_entries)
+    # The scenario entries and the random requests are joined in a single concat
+    log_df = pd.concat([pd.DataFrame(all_request_entries), other_requests_df], ignore_index=True)
     log_df.sort_values(by="request_timestamp", inplace=True, ignore_index=True)
     # Save into the system_log directory where the loader expects the file
-    log_df.to_csv("system_log/patient_request_log.csv", index=False)
+    # Access flags as int8 for both writers: the CSV formatter stays on its integer path
+    # and Parquet stores one byte each
+    log_df = log_df.astype({attr: 'int8' for attr in REQUESTABLE_ATTRIBUTES})
+    # The Parquet copy gets parsed timestamps (missing process_timestamp -> NaT)
+    parquet_df = log_df.assign(**{ts_col: pd.to_datetime(log_df[ts_col], format='ISO8601', errors='coerce')
+                                  for ts_col in ('request_timestamp', 'process_timestamp')})
+    data_loader.write_table(log_df, "system_log/patient_request_log.csv", parquet_df=parquet_df)
 
     print(f"\n--- Patient Request Log Generation Complete ---")
     print(f"Generated {len(log_df)} total request entries and saved to 'patient_request_log.csv'.")
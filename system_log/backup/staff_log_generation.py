@@ -1,8 +1,9 @@
+import numpy as np
 import pandas as pd
-from faker import Faker
-import random
 from datetime import datetime, timedelta
 
+import data_loader
+
 # --- 1. CONFIGURATION (with Personalization) ---
 NUM_LOG_ENTRIES = 100
 VIOLATION_RATE = 0.15 # Target violation rate (e.g., 5% of staff actions will be violations)
@@ -26,6 +27,12 @@ PURPOSE_TO_ATTRIBUTES = {
     "marketing": ["billing_info"] # Added marketing purpose
 }
 
+# The access-flag columns of a log entry, in output order
+ACCESS_ATTRIBUTES = ('lab_result', 'clinical_note', 'billing_info')
+# (lab_result, clinical_note, billing_info) 0/1 flags of each purpose's legitimate attributes
+PURPOSE_FLAGS = {purpose: tuple(int(attr in attrs) for attr in ACCESS_ATTRIBUTES)
+                 for purpose, attrs in PURPOSE_TO_ATTRIBUTES.items()}
+
 ROLE_PERMISSIONS = {
     'doctor': ['diagnosis', 'research'],
     'billing_clerk': ['billing', 'marketing']
@@ -44,8 +51,7 @@ def create_log_entry(log_id, principal, action, resource, purpose, timestamp, la
 
 # --- 2. SCENARIO GENERATION ---
 if __name__ == "__main__":
-    Faker.seed(0)
-    random.seed(0)
+    rng = np.random.default_rng(0)
     violating_entries = []
     log_counter = 0
 
@@ -116,39 +122,53 @@ if __name__ == "__main__":
     # --- Generate Benign (Compliant) Traffic (CORRECTED LOGIC) ---
     num_benign_entries = NUM_LOG_ENTRIES - len(violating_entries)
     print(f"Generating {num_benign_entries} benign staff log entries...")
-    benign_entries = []
     # patient_doctor_map = {patient: random.choice(DOCTORS) for patient in PATIENTS}
     patient_doctor_map = {"pat_2":"doc_0", "pat_16":"doc_0", "pat_11":"doc_1", "pat_13":"doc_1", "pat_15":"doc_1", "pat_3":"doc_2", "pat_7":"doc_2", "pat_9":"doc_2", "pat_14":"doc_2", "pat_18":"doc_2", "pat_0":"doc_3", "pat_1":"doc_3", "pat_5":"doc_3", "pat_6":"doc_3", "pat_8":"doc_3", "pat_4":"doc_4", "pat_10":"doc_4", "pat_12":"doc_4", "pat_17":"doc_4", "pat_19":"doc_4"}
-    # Map patients to their assigned doctors
-    staff_principals = DOCTORS + BILLING_STAFF
-    
-    for i in range(num_benign_entries):
-        principal = random.choice(staff_principals)
-        role = 'doctor' if 'doc' in principal else 'billing_clerk'
-        
-        # Select a purpose that is valid for the principal's role
-        valid_purposes = ROLE_PERMISSIONS[role]
-        purpose = random.choice(valid_purposes)
-        
-        # Select a patient and ensure the doctor is the assigned one
-        patient = random.choice(PATIENTS)
-        if role == 'doctor':
-            principal = patient_doctor_map.get(patient, principal) # Use assigned doctor
-        
-        record = PHI_RECORDS[patient]
-        
-        # Get the valid attributes for the chosen purpose
-        accessed_types = PURPOSE_TO_ATTRIBUTES[purpose]
-        
-        benign_entries.append(create_log_entry(f"log_{log_counter}", principal, "read_phi", record, purpose, Faker().date_time_between(start_date=START_DATE, end_date=END_DATE), "benign", accessed_types)); log_counter += 1
+    staff_principals = np.array(DOCTORS + BILLING_STAFF)
+    # Per-patient lookup arrays, indexed by the drawn patient positions below;
+    # assigned_doctors maps each patient to their doctor ('' if none) in one fancy-index op
+    assigned_doctors = np.array([patient_doctor_map.get(patient, '') for patient in PATIENTS])
+    patient_records = np.array([PHI_RECORDS[patient] for patient in PATIENTS])
+    # Purposes are drawn as indices into purpose_names; row p of purpose_flags is PURPOSE_FLAGS of purpose p
+    purpose_names = list(PURPOSE_FLAGS)
+    purpose_flags = np.array(list(PURPOSE_FLAGS.values()), dtype=np.int8)
+    doctor_purposes = np.array([purpose_names.index(p) for p in ROLE_PERMISSIONS['doctor']])
+    clerk_purposes = np.array([purpose_names.index(p) for p in ROLE_PERMISSIONS['billing_clerk']])
+
+    # Draw every benign entry's principal, purpose, patient and time in one call each
+    principal = staff_principals[rng.integers(len(staff_principals), size=num_benign_entries)]
+    is_doctor = np.char.find(principal, 'doc') >= 0
+    # Select a purpose that is valid for the principal's role
+    purpose_idx = np.where(is_doctor,
+                           doctor_purposes[rng.integers(len(doctor_purposes), size=num_benign_entries)],
+                           clerk_purposes[rng.integers(len(clerk_purposes), size=num_benign_entries)])
+    # Select a patient and ensure the doctor is the assigned one
+    patient_idx = rng.integers(len(PATIENTS), size=num_benign_entries)
+    principal = np.where(is_doctor & (assigned_doctors[patient_idx] != ''), assigned_doctors[patient_idx], principal)
+    span_seconds = int((END_DATE - START_DATE).total_seconds())
+    timestamp = pd.Timestamp(START_DATE) + pd.to_timedelta(rng.integers(span_seconds + 1, size=num_benign_entries), unit='s')
+
+    # Same columns as create_log_entry; the accessed attributes are the valid ones for the purpose
+    benign_df = pd.DataFrame({
+        "log_id": "log_" + np.arange(log_counter, log_counter + num_benign_entries).astype(str).astype(object),
+        "principal": principal, "action": "read_phi", "resource": patient_records[patient_idx],
+        **dict(zip(ACCESS_ATTRIBUTES, purpose_flags[purpose_idx].T)),
+        "purpose": np.array(purpose_names)[purpose_idx], "timestamp": timestamp.strftime('%Y-%m-%dT%H:%M:%S'), "label": "benign"
+    })
+    log_counter += num_benign_entries
     
 
     # --- Finalize and Save ---
-    all_log_entries = violating_entries + benign_entries
-    log_df = pd.DataFrame(all_log_entries)
+    log_df = (pd.concat([pd.DataFrame(violating_entries), benign_df], ignore_index=True)
+              if violating_entries else benign_df)
     log_df.sort_values(by="timestamp", inplace=True, ignore_index=True)
     # Save into the system_log directory where other logs live and the loader can find it
-    log_df.to_csv("system_log/staff_activity_log.csv", index=False)
+    # Access flags as int8 for both writers: the CSV formatter stays on its integer path
+    # (the violation dicts would otherwise mix in Python ints) and Parquet stores one byte each
+    log_df = log_df.astype({attr: 'int8' for attr in ACCESS_ATTRIBUTES})
+    # The Parquet copy gets parsed timestamps
+    data_loader.write_table(log_df, "system_log/staff_activity_log.csv",
+                            parquet_df=log_df.assign(timestamp=pd.to_datetime(log_df['timestamp'], format='ISO8601')))
 
     print(f"\n--- Hospital Staff Log Generation Complete ---")
     print(f"Generated {len(log_df)} total log entries and saved to 'staff_activity_log.csv'.")
@@ -159,7 +179,7 @@ if __name__ == "__main__":
     actual_violation_rate = num_violations / len(log_df) if len(log_df) > 0 else 0
     
     print(f"Total Entries: {len(log_df)}")
-    print(f"Benign Entries: {len(benign_entries)}")
+    print(f"Benign Entries: {len(benign_df)}")
     print(f"Violating Entries: {num_violations} (Actual Rate: {actual_violation_rate:.2%})")
     
     if num_violations > 0:
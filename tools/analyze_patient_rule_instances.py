@@ -4,8 +4,6 @@
 Usage: PYTHONPATH=. python3 tools/analyze_patient_rule_instances.py system_log/patient_request_1000.csv
 """
 import sys
-from collections import defaultdict, Counter
-import pandas as pd
 
 import data_loader
 from auditor import Auditor
@@ -14,22 +12,24 @@ from auditor import Auditor
 def analyze(path, kb_file='knowledge_base/knowledge_base.csv', audit_date='2025-08-31', max_samples=5):
     print(f'Analyzing {path}...')
     kb_df = data_loader.load_knowledge_base(kb_file)
-    patient_df = data_loader.load_patient_log(path)
+    patient_df = data_loader.load_patient_log(data_loader.prefer_parquet(path))
     labeled = int((patient_df['label'] != 'benign').sum()) if 'label' in patient_df.columns else 0
 
     aud = Auditor('policy/policy.pl')
     aud.load_kb_facts(kb_df)
-    violations = aud.run_audit(patient_df, audit_date)
+    try:
+        # Violations as a DataFrame, one row per rule instance
+        vdf = aud.run_audit(patient_df, audit_date, as_frame=True)
+    finally:
+        # Delete the temporary KB file written by load_kb_facts
+        aud.unload_kb_facts()
 
-    total_rule_instances = len(violations)
-    grouped = defaultdict(list)
-    for v in violations:
-        ts = v.get('timestamp')
-        # Use request_timestamp string if available in DataFrame rows
-        key = f"{v.get('Principal')}|{v.get('ObjectID')}|{ts}"
-        grouped[key].append(v.get('RuleID'))
-
-    counts = Counter(len(set(rules)) for rules in grouped.values())
+    total_rule_instances = len(vdf)
+    # Distinct rules of each violating row (Principal, ObjectID, timestamp), grouped by
+    # pandas; rows keep the order in which they were first detected
+    grouped = vdf.groupby(['Principal', 'ObjectID', 'timestamp'], sort=False, dropna=False)['RuleID'].unique()
+    num_rules_per_row = grouped.map(len)
+    counts = num_rules_per_row.value_counts().sort_index()
 
     print('\nSummary:')
     print(f'  total_rows (file): {len(patient_df)}')
@@ -37,22 +37,30 @@ def analyze(path, kb_file='knowledge_base/knowledge_base.csv', audit_date='2025-
     print(f'  auditor_rule_instances: {total_rule_instances}')
     print(f'  unique_violating_rows (detected): {len(grouped)}')
     print('  distribution of distinct rules per unique row:')
-    for num_rules, cnt in sorted(counts.items()):
+    for num_rules, cnt in counts.items():
         print(f'    rows with {num_rules} distinct rule(s): {cnt}')
 
-    multi_keys = [k for k, rules in grouped.items() if len(set(rules)) > 1]
-    if not multi_keys:
+    multi = grouped[num_rules_per_row > 1]
+    if multi.empty:
         print('\nNo multi-rule rows detected.')
         return
 
-    print(f'\nFound {len(multi_keys)} unique rows that triggered multiple distinct rules. Showing up to {max_samples} samples:')
-    samples = multi_keys[:max_samples]
-    patient_df['_row_key'] = patient_df.apply(lambda r: f"{r['principal']}|{r['resource']}|{r.get('request_timestamp')}", axis=1)
-    for k in samples:
+    print(f'\nFound {len(multi)} unique rows that triggered multiple distinct rules. Showing up to {max_samples} samples:')
+    # row_key is 'principal|object|timestamp', matched against the log rows below
+    samples = {f'{principal}|{object_id}|{ts}': rules
+               for (principal, object_id, ts), rules in multi.iloc[:max_samples].items()}
+    # Same key format as above, built with vectorized string concatenation; the timestamp
+    # is formatted exactly like str(Timestamp), fraction of a second included (NaT -> 'NaT')
+    request_ts = data_loader.timestamp_text(patient_df['request_timestamp'])
+    patient_df['_row_key'] = (patient_df['principal'].astype(str) + '|' + patient_df['resource'].astype(str)
+                              + '|' + request_ts)
+    # Keep only the rows of the sampled keys, so each lookup below scans a small frame
+    sample_rows = patient_df[patient_df['_row_key'].isin(set(samples))]
+    for k, rules in samples.items():
         print('\n---')
         print('row_key:', k)
-        print('detected rules:', sorted(set(grouped[k])))
-        matched = patient_df[patient_df['_row_key'] == k]
+        print('detected rules:', sorted(rules))
+        matched = sample_rows[sample_rows['_row_key'] == k]
         if not matched.empty:
             print('matching log row(s):')
             print(matched.to_string(index=False))
@@ -4,9 +4,6 @@
 Usage: PYTHONPATH=. python3 tools/analyze_rule_instances.py system_log/staff_activity_1000.csv
 """
 import sys
-from collections import defaultdict, Counter
-from pathlib import Path
-import pandas as pd
 
 import data_loader
 from auditor import Auditor
@@ -14,22 +11,24 @@ from auditor import Auditor
 def analyze(path, kb_file='knowledge_base/knowledge_base.csv', audit_date='2025-08-31', max_samples=5):
     print(f'Analyzing {path}...')
     kb_df = data_loader.load_knowledge_base(kb_file)
-    staff_df = data_loader.load_staff_log(path)
+    staff_df = data_loader.load_staff_log(data_loader.prefer_parquet(path))
     labeled = int((staff_df['label'] != 'benign').sum()) if 'label' in staff_df.columns else 0
 
     aud = Auditor('policy/policy.pl')
     aud.load_kb_facts(kb_df)
-    violations = aud.run_audit(staff_df, audit_date)
+    try:
+        # Violations as a DataFrame, one row per rule instance
+        vdf = aud.run_audit(staff_df, audit_date, as_frame=True)
+    finally:
+        # Delete the temporary KB file written by load_kb_facts
+        aud.unload_kb_facts()
 
-    total_rule_instances = len(violations)
-    # group ruleIDs per unique row key
-    grouped = defaultdict(list)
-    for v in violations:
-        ts = v.get('timestamp')
-        key = f"{v.get('Principal')}|{v.get('ObjectID')}|{ts}"
-        grouped[key].append(v.get('RuleID'))
-
-    counts = Counter(len(set(rules)) for rules in grouped.values())
+    total_rule_instances = len(vdf)
+    # group the distinct ruleIDs per unique row (Principal, ObjectID, timestamp) with
+    # pandas; rows keep the order in which they were first detected
+    grouped = vdf.groupby(['Principal', 'ObjectID', 'timestamp'], sort=False, dropna=False)['RuleID'].unique()
+    num_rules_per_row = grouped.map(len)
+    counts = num_rules_per_row.value_counts().sort_index()
 
     print('\nSummary:')
     print(f'  total_rows (file): {len(staff_df)}')
@@ -37,24 +36,33 @@ def analyze(path, kb_file='knowledge_base/knowledge_base.csv', audit_date='2025-
     print(f'  auditor_rule_instances: {total_rule_instances}')
     print(f'  unique_violating_rows (detected): {len(grouped)}')
     print('  distribution of distinct rules per unique row:')
-    for num_rules, cnt in sorted(counts.items()):
+    for num_rules, cnt in counts.items():
         print(f'    rows with {num_rules} distinct rule(s): {cnt}')
 
     # show some sample problematic rows (where >1 rule)
-    multi_keys = [k for k, rules in grouped.items() if len(set(rules)) > 1]
-    if not multi_keys:
+    multi = grouped[num_rules_per_row > 1]
+    if multi.empty:
         print('\nNo multi-rule rows detected.')
         return
 
-    print(f'\nFound {len(multi_keys)} unique rows that triggered multiple distinct rules. Showing up to {max_samples} samples:')
-    samples = multi_keys[:max_samples]
-    # load staff_df index by key for printing row content
-    staff_df['_row_key'] = staff_df.apply(lambda r: f"{r['principal']}|{r['resource']}|{r.get('timestamp')}", axis=1)
-    for k in samples:
+    print(f'\nFound {len(multi)} unique rows that triggered multiple distinct rules. Showing up to {max_samples} samples:')
+    samples = {f'{principal}|{object_id}|{ts}': rules
+               for (principal, object_id, ts), rules in multi.iloc[:max_samples].items()}
+    # load staff_df index by key for printing row content; the key is built with
+    # vectorized string concatenation, the timestamp formatted exactly like
+    # str(Timestamp), fraction of a second included (NaT -> 'NaT')
+    timestamps = data_loader.timestamp_text(staff_df['timestamp'])
+    staff_df['_row_key'] = (staff_df['principal'].astype(str) + '|' + staff_df['resource'].astype(str)
+                            + '|' + timestamps)
+    # Index the rows by key once, so each sample is a hash lookup instead of a scan of
+    # the whole log; the key column is kept so the printed rows are unchanged
+    staff_by_key = staff_df.set_index('_row_key', drop=False)
+    for k, rules in samples.items():
         print('\n---')
         print('row_key:', k)
-        print('detected rules:', sorted(set(grouped[k])))
-        matched = staff_df[staff_df['_row_key'] == k]
+        print('detected rules:', sorted(rules))
+        # a list indexer always gives a DataFrame, even for a single matching row
+        matched = staff_by_key.loc[[k]] if k in staff_by_key.index else staff_by_key.iloc[:0]
         if not matched.empty:
             print('matching log row(s):')
             print(matched.to_string(index=False))
@@ -12,132 +12,117 @@ patient and PHI record ids and to ensure we select patients who have
 assigned doctors (so violations will be attributable in the policy).
 """
 import math
-import csv
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
+import numpy as np
 import pandas as pd
 
+import data_loader
+
 KB_FILE = "knowledge_base/knowledge_base.csv"
 OUT_DIR = "system_log"
 SIZES = [100, 1000, 5000, 10000, 50000]
 VIOLATION_RATE = 0.05
 AUDIT_DATE = datetime(2025, 8, 31)
+# Attributes an access request can ask for
+REQUESTABLE_ATTRIBUTES = ('lab_result', 'clinical_note', 'billing_info')
+# Columns of a generated log, in output order
+FIELDNAMES = ['log_id', 'principal', 'action', 'resource', *REQUESTABLE_ATTRIBUTES,
+              'request_timestamp', 'process_timestamp', 'label']
 
 
 def load_kb(kb_file=KB_FILE):
-    df = pd.read_csv(kb_file, dtype=str)
-    return df.fillna('')
+    # Empty fields are read as '' directly (no NaN detection), so no fillna copy is needed
+    return pd.read_csv(kb_file, dtype=str, na_filter=False)
 
 
 def build_patient_phi_map(kb_df):
     # owns_phi_record(Patient, PHI_Record)
-    mask = (kb_df['fact_name'] == 'owns_phi_record')
+    mask = (kb_df['fact_name'] == 'owns_phi_record') & (kb_df['arg1'] != '') & (kb_df['arg2'] != '')
     rows = kb_df[mask]
     mapping = {}
-    for _, r in rows.iterrows():
-        patient = r['arg1']
-        phi = r['arg2']
-        if patient and phi:
-            mapping.setdefault(patient, []).append(phi)
+    # zip over the two columns' arrays: no Series is built per row as with iterrows
+    for patient, phi in zip(rows['arg1'].to_numpy().tolist(), rows['arg2'].to_numpy().tolist()):
+        mapping.setdefault(patient, []).append(phi)
     return mapping
 
 
 def build_patient_with_doctor_set(kb_df):
     # is_doctor_of(Doctor, Patient) -> we want patients that have at least one doctor
-    mask = (kb_df['fact_name'] == 'is_doctor_of')
-    rows = kb_df[mask]
-    patients = set()
-    for _, r in rows.iterrows():
-        patient = r['arg2']
-        if patient:
-            patients.add(patient)
-    return patients
-
-
-def iso(ts):
-    return ts.strftime('%Y-%m-%dT%H:%M:%S')
-
-
-def make_access_row(req_id, patient, phi, req_time, fulfilled=False, requested_attrs=None):
-    # process_timestamp is left empty for unfulfilled requests (violations)
-    proc_time = None if not fulfilled else (req_time + timedelta(days=random.randint(1, 25)))
-    requested_attrs = requested_attrs or ['clinical_note']
-    return {
-        'log_id': req_id,
-        'principal': patient,
-        'action': 'request_access',
-        'resource': phi,
-        'lab_result': 1 if 'lab_result' in requested_attrs else 0,
-        'clinical_note': 1 if 'clinical_note' in requested_attrs else 0,
-        'billing_info': 1 if 'billing_info' in requested_attrs else 0,
-        'request_timestamp': iso(req_time),
-        'process_timestamp': iso(proc_time) if proc_time else '',
-        'label': 'violation_gdpr_art15' if not fulfilled and (AUDIT_DATE - req_time).days > 30 else 'benign'
-    }
-
-
-def make_deactivation_row(req_id, patient, phi, req_time, fulfilled=False):
-    proc_time = iso(req_time + timedelta(days=random.randint(1, 25))) if fulfilled else ''
-    return {
-        'log_id': req_id,
-        'principal': patient,
-        'action': 'request_deactivation',
-        'resource': phi,
-        'lab_result': 0,
-        'clinical_note': 0,
-        'billing_info': 0,
-        'request_timestamp': iso(req_time),
-        'process_timestamp': proc_time,
-        'label': 'violation_gdpr_art17' if not fulfilled and (AUDIT_DATE - req_time).days > 30 else 'benign'
-    }
+    patients = kb_df.loc[kb_df['fact_name'] == 'is_doctor_of', 'arg2']
+    return set(patients[patients != ''].unique())
 
 
-def generate_for_size(n, patient_phi_map, patients_with_doctor):
-    rows = []
+def format_timestamps(series):
+    # '%Y-%m-%dT%H:%M:%S' text for a whole datetime column in one NumPy pass
+    # (dt.strftime formats value by value); NaT -> None, an empty CSV field
+    text = np.datetime_as_string(series.to_numpy(dtype='datetime64[s]'), unit='s')
+    return pd.Series(np.where(series.isna().to_numpy(), None, text), index=series.index)
+
+
+def generate_for_size(n, patient_phi_map, patients_with_doctor, rng):
     violation_target = int(math.ceil(n * VIOLATION_RATE))
     benign_target = n - violation_target
 
-    # Generate benign rows first
-    for i in range(benign_target):
-        # pick a patient that has a phi mapping
-        patient = random.choice(list(patient_phi_map.keys()))
-        phi = random.choice(patient_phi_map[patient])
-        # choose a request timestamp within 30 days of audit date (benign)
-        days_before = random.randint(1, 29)
-        req_time = AUDIT_DATE - timedelta(days=days_before)
-        # randomly choose access or deactivation
-        if random.random() < 0.7:
-            # access request fulfilled within 30 days
-            row = make_access_row(f'req_ben_{i}', patient, phi, req_time, fulfilled=True,
-                                  requested_attrs=random.sample(['lab_result','clinical_note','billing_info'], random.randint(1,3)))
-        else:
-            row = make_deactivation_row(f'req_ben_{i}', patient, phi, req_time, fulfilled=True)
-        rows.append(row)
-
-    # Violations: make sure each violates exactly one rule
-    # Split violations roughly half access vs deactivation
-    for j in range(violation_target):
-        patient = random.choice(list(patients_with_doctor)) if patients_with_doctor else random.choice(list(patient_phi_map.keys()))
-        phi = random.choice(patient_phi_map.get(patient, list(next(iter(patient_phi_map.values())))))
-        # choose a request timestamp older than 30 days so it's eligible as violation
-        days_before = random.randint(31, 200)
-        req_time = AUDIT_DATE - timedelta(days=days_before)
-        if j % 2 == 0:
-            # create an access request that is unfulfilled (triggers gdpr_art15_access)
-            requested_attrs = random.sample(['lab_result','clinical_note','billing_info'], random.randint(1,3))
-            row = make_access_row(f'req_vio_{j}', patient, phi, req_time, fulfilled=False, requested_attrs=requested_attrs)
-        else:
-            # create a deactivation request that is unfulfilled (triggers gdpr_art17_erasure)
-            row = make_deactivation_row(f'req_vio_{j}', patient, phi, req_time, fulfilled=False)
-        rows.append(row)
+    # Patients are picked from arrays built once; the doctor set is sorted so the
+    # picks do not depend on string hash order
+    patients = np.array(list(patient_phi_map), dtype=object)
+    violation_pool = np.array(sorted(patients_with_doctor), dtype=object) if patients_with_doctor else patients
+    # Every patient's PHI records laid out back to back: patient k owns
+    # all_phis[phi_start[k]:phi_start[k] + phi_count[k]]
+    phi_count = np.array([len(phis) for phis in patient_phi_map.values()])
+    phi_start = np.concatenate([[0], np.cumsum(phi_count)[:-1]])
+    all_phis = np.array([phi for phis in patient_phi_map.values() for phi in phis], dtype=object)
+    # Position of each pool patient in patients; one without PHI records takes the
+    # records of the first patient
+    patient_pos = {patient: k for k, patient in enumerate(patient_phi_map)}
+    pool_pos = np.array([patient_pos.get(patient, 0) for patient in violation_pool])
+
+    # Every random quantity of this size is drawn from the NumPy Generator in one
+    # vectorized call, and the rows are assembled a column at a time from them.
+    # Rows 0..benign_target-1 are the benign ones, the rest the violations.
+    benign_patients = rng.integers(len(patients), size=benign_target)
+    violation_patients = rng.integers(len(violation_pool), size=violation_target)
+    # position in the patient's PHI list, as a fraction of its length
+    phi_draw = rng.random(n)
+    # benign requests are within 30 days of the audit date, violations older
+    days_before = np.concatenate([rng.integers(1, 30, size=benign_target),
+                                  rng.integers(31, 201, size=violation_target)])
+    # Benign requests are access (70%) or deactivation requests, fulfilled within 30 days;
+    # violations alternate between an unfulfilled access request (triggers gdpr_art15_access)
+    # and an unfulfilled deactivation request (triggers gdpr_art17_erasure)
+    is_access = np.concatenate([rng.random(benign_target) < 0.7, np.arange(violation_target) % 2 == 0])
+    delay_days = rng.integers(1, 26, size=benign_target)
+    # Requested attributes: a random number of them, taken from a random ordering
+    # of REQUESTABLE_ATTRIBUTES per request; deactivation requests ask for none
+    num_attrs = rng.integers(1, len(REQUESTABLE_ATTRIBUTES) + 1, size=n)
+    attr_rank = rng.permuted(np.tile(np.arange(len(REQUESTABLE_ATTRIBUTES)), (n, 1)), axis=1)
+    requested = (attr_rank < num_attrs[:, None]) & is_access[:, None]
+
+    owner = np.concatenate([benign_patients, pool_pos[violation_patients]])
+    req_time = np.datetime64(AUDIT_DATE, 's') - days_before.astype('timedelta64[D]')
+    # process_timestamp is left empty (NaT) for the unfulfilled violations
+    proc_time = np.concatenate([req_time[:benign_target] + delay_days.astype('timedelta64[D]'),
+                                np.full(violation_target, np.datetime64('NaT', 's'))])
+    violation_label = np.where(is_access, 'violation_gdpr_art15', 'violation_gdpr_art17')
+    is_violation = (np.arange(n) >= benign_target) & (days_before > 30)
+    log_df = pd.DataFrame({
+        'log_id': np.concatenate([[f'req_ben_{i}' for i in range(benign_target)],
+                                  [f'req_vio_{j}' for j in range(violation_target)]]),
+        'principal': np.concatenate([patients[benign_patients], violation_pool[violation_patients]]),
+        'action': np.where(is_access, 'request_access', 'request_deactivation'),
+        'resource': all_phis[phi_start[owner] + (phi_draw * phi_count[owner]).astype(int)],
+        **{attr: requested[:, i].astype(np.int8) for i, attr in enumerate(REQUESTABLE_ATTRIBUTES)},
+        'request_timestamp': req_time,
+        'process_timestamp': proc_time,
+        'label': np.where(is_violation, violation_label, 'benign'),
+    }, columns=FIELDNAMES)
 
     # Shuffle so violations are spread
-    random.shuffle(rows)
-    return rows
+    return log_df.iloc[rng.permutation(n)].reset_index(drop=True)
 
 
 def main():
-    random.seed(0)
+    rng = np.random.default_rng(0)
     kb = load_kb()
     patient_phi_map = build_patient_phi_map(kb)
     if not patient_phi_map:
@@ -145,15 +130,16 @@ def main():
     patients_with_doctor = build_patient_with_doctor_set(kb)
 
     for size in SIZES:
-        rows = generate_for_size(size, patient_phi_map, patients_with_doctor)
+        log_df = generate_for_size(size, patient_phi_map, patients_with_doctor, rng)
         out_file = f"{OUT_DIR}/patient_request_{size}.csv"
-        print(f"Writing {len(rows)} rows to {out_file} (target violations: {int(math.ceil(size*VIOLATION_RATE))})")
-        # Write CSV with headers matching loader expectations
-        with open(out_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['log_id','principal','action','resource','lab_result','clinical_note','billing_info','request_timestamp','process_timestamp','label'])
-            writer.writeheader()
-            for r in rows:
-                writer.writerow(r)
+        print(f"Writing {len(log_df)} rows to {out_file} (target violations: {int(math.ceil(size*VIOLATION_RATE))})")
+        # The log keeps datetimes (NaT for unprocessed requests) and int8 access flags;
+        # both timestamp columns are formatted in one vectorized pass each
+        csv_df = log_df.assign(**{ts_col: format_timestamps(log_df[ts_col])
+                                  for ts_col in ('request_timestamp', 'process_timestamp')})
+        # Write CSV with headers matching loader expectations (CRLF rows, as csv.writer wrote them);
+        # the Parquet copy stores the timestamps parsed, so loading it needs no date parsing
+        data_loader.write_table(csv_df, out_file, parquet_df=log_df, lineterminator='\r\n')
 
 
 if __name__ == '__main__':
@@ -7,12 +7,13 @@ Each file contains a mix of benign and violating entries; violation rate is conf
 This script uses the KB at knowledge_base/knowledge_base.csv to pick principals,
 PHI records, and consent/role facts so violations are realistic.
 """
-import csv
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+import data_loader
+
 
 OUT_DIR = Path('system_log')
 OUT_DIR.mkdir(exist_ok=True)
@@ -32,6 +33,9 @@ PURPOSE_TO_ATTRIBUTES = {
     'research': ['clinical_note', 'lab_result'],
     'marketing': ['billing_info']
 }
+ALL_PURPOSES = tuple(PURPOSE_TO_ATTRIBUTES)
+# Violation types a violating row is built for, each triggering exactly one rule
+VIOLATION_TYPES = ['hipaa_auth', 'hipaa_min_necessary', 'gdpr_art18_restriction']
 
 
 def load_kb(kb_path=KB_PATH):
@@ -40,226 +44,227 @@ def load_kb(kb_path=KB_PATH):
 
 
 def extract_entities(kb_df):
-    doctors = kb_df[(kb_df.fact_name == 'has_role') & (kb_df.arg2 == 'doctor')]['arg1'].unique().tolist()
-    billing = kb_df[(kb_df.fact_name == 'has_role') & (kb_df.arg2 == 'billing_clerk')]['arg1'].unique().tolist()
-    patients = kb_df[(kb_df.fact_name == 'has_role') & (kb_df.arg2 == 'patient')]['arg1'].unique().tolist()
-    owns = kb_df[kb_df.fact_name == 'owns_phi_record'][['arg1','arg2']].values.tolist()
+    # Partition the KB by fact name in one pass; each lookup below then scans only
+    # the facts of its own name (no_facts stands in for a name the KB lacks)
+    by_fact = {name: facts for name, facts in kb_df.groupby('fact_name', sort=False)}
+    no_facts = kb_df.iloc[:0]
+    roles = by_fact.get('has_role', no_facts)
+    doctors = roles[roles.arg2 == 'doctor']['arg1'].unique().tolist()
+    billing = roles[roles.arg2 == 'billing_clerk']['arg1'].unique().tolist()
+    patients = roles[roles.arg2 == 'patient']['arg1'].unique().tolist()
+    owns = by_fact.get('owns_phi_record', no_facts)[['arg1','arg2']].values.tolist()
     # map patient -> phi
     phi_map = {p: r for (p, r) in owns}
-    # list of phi records
-    phi_records = list(phi_map.values())
+    # phi records, as a tuple view in phi_map order
+    phi_records = tuple(phi_map.values())
     # restrictions for gdpr_art18: find (patient,purpose) with has_restriction
-    restricted = kb_df[kb_df.fact_name == 'has_restriction'][['arg1','arg2']].values.tolist()
+    restricted = by_fact.get('has_restriction', no_facts)[['arg1','arg2']].values.tolist()
     restricted_map = {}
     for p, purpose in restricted:
         restricted_map.setdefault(p, []).append(purpose)
     # build patient -> assigned doctor mapping from is_doctor_of facts
-    doctor_assignments = kb_df[kb_df.fact_name == 'is_doctor_of'][['arg1','arg2']].values.tolist()
+    doctor_assignments = by_fact.get('is_doctor_of', no_facts)[['arg1','arg2']].values.tolist()
     patient_to_doctor = {patient: doctor for (doctor, patient) in doctor_assignments}
     # build patient -> unrestricted purposes mapping
-    unrestricted = kb_df[kb_df.fact_name == 'has_unrestricted_status'][['arg1','arg2']].values.tolist()
+    unrestricted = by_fact.get('has_unrestricted_status', no_facts)[['arg1','arg2']].values.tolist()
     unrestricted_map = {}
     for p, purpose in unrestricted:
         unrestricted_map.setdefault(p, []).append(purpose)
     # build role -> allowed attribute map from role_can_access_type facts
     role_access = {}
-    access_facts = kb_df[kb_df.fact_name == 'role_can_access_type'][['arg1','arg2']].values.tolist()
+    access_facts = by_fact.get('role_can_access_type', no_facts)[['arg1','arg2']].values.tolist()
     for role, attr in access_facts:
         role_access.setdefault(role, []).append(attr)
-    return doctors, billing, patients, phi_map, phi_records, restricted_map, patient_to_doctor, unrestricted_map, role_access
-
-
-def rand_timestamp(start=START_DATE, end=END_DATE):
-    delta = end - start
-    sec = random.randint(0, int(delta.total_seconds()))
-    ts = start + timedelta(seconds=sec)
-    return ts.strftime('%Y-%m-%dT%H:%M:%S')
-
-
-def make_benign_entry(log_id, doctors, billing, patients, phi_map, patient_to_doctor, unrestricted_map, role_access):
-    # choose a doctor and their patient, or a billing clerk for billing purpose
-    if random.random() < 0.8:
-        # doctor legitimate read
-        patient = random.choice(list(phi_map.keys()))
-        # choose the assigned doctor for this patient when available
-        doctor = patient_to_doctor.get(patient, None)
-        if doctor is None:
-            doctor = random.choice(doctors) if doctors else 'doc_0'
-        record = phi_map.get(patient, random.choice(list(phi_map.values())))
-
-        # choose a purpose that the patient has allowed when possible
-        allowed = unrestricted_map.get(patient)
-        if allowed:
-            purpose = random.choice(allowed)
-        else:
-            purpose = random.choice(['diagnosis','research'])
-
-        attrs = PURPOSE_TO_ATTRIBUTES[purpose]
-        # determine allowed attributes for this principal's role
-        role = 'doctor' if str(doctor).startswith('doc_') else ('billing_clerk' if str(doctor).startswith('bclerk') else None)
-        allowed_attrs = role_access.get(role, []) if role else []
-        # set attributes only if allowed by role and purpose
-        lab = 1 if ('lab_result' in attrs and 'lab_result' in allowed_attrs and random.random() < 0.8) else 0
-        clin = 1 if ('clinical_note' in attrs and 'clinical_note' in allowed_attrs and random.random() < 0.8) else 0
-        bill = 1 if ('billing_info' in attrs and 'billing_info' in allowed_attrs and random.random() < 0.05) else 0
-        ts = rand_timestamp()
-        label = 'benign'
-        return {
-            'log_id': log_id, 'principal': doctor, 'action': 'read_phi', 'resource': record,
-            'lab_result': lab, 'clinical_note': clin, 'billing_info': bill, 'purpose': purpose, 'timestamp': ts, 'label': label
-        }
-    else:
-        # billing clerk reading billing info
-        clerk = random.choice(billing) if billing else 'bclerk_0'
-        patient = random.choice(list(phi_map.keys()))
-        record = phi_map.get(patient, random.choice(list(phi_map.values())))
-        purpose = 'billing'
-        # billing clerks should only access billing_info
-        lab = 0
-        clin = 0
-        bill = 1
-        ts = rand_timestamp()
-        return {
-            'log_id': log_id, 'principal': clerk, 'action': 'read_phi', 'resource': record,
-            'lab_result': lab, 'clinical_note': clin, 'billing_info': bill, 'purpose': purpose, 'timestamp': ts, 'label': 'benign'
-        }
-
-
-def make_violation_entry(log_id, doctors, billing, patients, phi_map, restricted_map, violation_type, patient_to_doctor, unrestricted_map, role_access):
-    # Construct entries to trigger exactly one rule
-    if violation_type == 'hipaa_auth':
-        # doctor reads a PHI record not belonging to their patient
-        # pick a doctor and a PHI record owned by a patient that is not theirs
-        # pick a patient and then pick a doctor who is NOT the assigned doctor
-        patient = random.choice(list(phi_map.keys()))
-        assigned = patient_to_doctor.get(patient)
-        other_doctors = [d for d in doctors if d != assigned]
-        doctor = random.choice(other_doctors) if other_doctors else (random.choice(doctors) if doctors else 'doc_0')
-        record = phi_map[patient]
-        # pick a purpose that is NOT restricted for this patient to avoid GDPR overlap
-        candidate_purposes = [p for p in PURPOSE_TO_ATTRIBUTES.keys() if p not in restricted_map.get(patient, [])]
-        if not candidate_purposes:
-            purpose = 'diagnosis'
-        else:
-            purpose = random.choice(candidate_purposes)
-        # choose a single attribute allowed for doctors for this purpose (avoid multiple attrs)
-        doctor_allowed = role_access.get('doctor', [])
-        possible_attrs = [a for a in PURPOSE_TO_ATTRIBUTES.get(purpose, []) if a in doctor_allowed]
-        # default to clinical_note if nothing lines up
-        chosen_attr = possible_attrs[0] if possible_attrs else ('clinical_note')
-        lab = 1 if chosen_attr == 'lab_result' else 0
-        clin = 1 if chosen_attr == 'clinical_note' else 0
-        bill = 1 if chosen_attr == 'billing_info' else 0
-        ts = rand_timestamp()
-        return {
-            'log_id': log_id, 'principal': doctor, 'action': 'read_phi', 'resource': record,
-            'lab_result': lab, 'clinical_note': clin, 'billing_info': bill, 'purpose': purpose, 'timestamp': ts, 'label': 'violation_hipaa_auth'
-        }
-    elif violation_type == 'hipaa_min_necessary':
-        # billing clerk reads clinical_note or lab_result (not allowed)
-        clerk = random.choice(billing) if billing else 'bclerk_0'
-        patient = random.choice(list(phi_map.keys()))
-        record = phi_map[patient]
-        # choose purpose billing but attributes clinical_note or lab_result flagged
-        purpose = 'billing'
-        # pick exactly one disallowed attribute (clinical_note or lab_result)
-        if random.random() < 0.5:
-            lab = 1; clin = 0
-        else:
-            lab = 0; clin = 1
-        bill = 0
-        ts = rand_timestamp()
-        return {
-            'log_id': log_id, 'principal': clerk, 'action': 'read_phi', 'resource': record,
-            'lab_result': lab, 'clinical_note': clin, 'billing_info': bill, 'purpose': purpose, 'timestamp': ts, 'label': 'violation_hipaa_min_necessary'
-        }
-    elif violation_type == 'gdpr_art18_restriction':
-        # choose a patient that has a restriction for a purpose and use that purpose
-        if restricted_map:
-            patient = random.choice(list(restricted_map.keys()))
-            # pick a restricted purpose for this patient
-            purposes = restricted_map.get(patient, [])
-            purpose = random.choice(purposes) if purposes else random.choice(list(PURPOSE_TO_ATTRIBUTES.keys()))
-            record = phi_map.get(patient, random.choice(list(phi_map.values())))
-            purpose_attrs = PURPOSE_TO_ATTRIBUTES.get(purpose, [])
-            # prefer the assigned doctor but choose any principal whose role allows at least one of the purpose attributes
-            candidates = []
-            assigned = patient_to_doctor.get(patient)
-            if assigned:
-                candidates.append(assigned)
-            # include billing clerks as likely principals for billing-related attrs
-            candidates.extend(billing)
-            principal = None
-            chosen_attr = None
-            for cand in candidates:
-                role = 'doctor' if str(cand).startswith('doc_') else ('billing_clerk' if str(cand).startswith('bclerk') else None)
-                allowed_attrs = role_access.get(role, []) if role else []
-                possible = [a for a in purpose_attrs if a in allowed_attrs]
-                if possible:
-                    principal = cand
-                    chosen_attr = random.choice(possible)
-                    break
-            # fallback: if no candidate found, pick a principal randomly and pick the first purpose attr (may cause overlap)
-            if principal is None:
-                principal = patient_to_doctor.get(patient) or (random.choice(doctors + billing) if (doctors + billing) else 'doc_0')
-                chosen_attr = purpose_attrs[0] if purpose_attrs else 'clinical_note'
-            lab = 1 if chosen_attr == 'lab_result' else 0
-            clin = 1 if chosen_attr == 'clinical_note' else 0
-            bill = 1 if chosen_attr == 'billing_info' else 0
-            ts = rand_timestamp()
-            return {
-                'log_id': log_id, 'principal': principal, 'action': 'read_phi', 'resource': record,
-                'lab_result': lab, 'clinical_note': clin, 'billing_info': bill, 'purpose': purpose, 'timestamp': ts, 'label': 'violation_gdpr_art18'
-            }
+    # (role, purpose) -> the purpose's attributes that the role may access, so the
+    # makers look the list up instead of filtering it per row
+    purpose_role_attrs = {(role, purpose): [a for a in attrs if a in allowed]
+                          for role, allowed in role_access.items()
+                          for purpose, attrs in PURPOSE_TO_ATTRIBUTES.items()}
+    # principal -> role, from the has_role facts, so role checks need no id-prefix tests
+    principal_role = {p: 'doctor' for p in doctors}
+    principal_role.update({p: 'billing_clerk' for p in billing})
+    return doctors, billing, patients, phi_map, phi_records, restricted_map, patient_to_doctor, unrestricted_map, purpose_role_attrs, principal_role
+
+
+# Width of the timestamp range in seconds
+SPAN_SECONDS = int((END_DATE - START_DATE).total_seconds())
+
+
+def pick(options, rng, size):
+    # size items drawn uniformly from a non-empty sequence
+    return np.asarray(options, dtype=object)[rng.integers(len(options), size=size)]
+
+
+def pick_per_group(lists, groups, rng):
+    # One item per row, drawn uniformly from lists[groups[row]]; the lists are laid out
+    # back to back, so all rows are drawn with one fancy index. Every list must be non-empty.
+    counts = np.array([len(options) for options in lists])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    flat = np.array([item for options in lists for item in options], dtype=object)
+    return flat[starts[groups] + (rng.random(len(groups)) * counts[groups]).astype(int)]
+
+
+def role_allows(roles, purposes, attr, purpose_role_attrs):
+    # True for the rows whose (role, purpose) may access attr
+    allowed = np.zeros(len(roles), dtype=bool)
+    for (role, purpose), attrs in purpose_role_attrs.items():
+        if attr in attrs:
+            allowed |= (roles == role) & (purposes == purpose)
+    return allowed
+
+
+def read_rows(principal, resource, purpose, lab, clin, bill, label):
+    # read_phi rows from per-row arrays (or constants), without log_id and timestamp
+    return pd.DataFrame({
+        'principal': principal, 'action': 'read_phi', 'resource': resource,
+        'lab_result': np.asarray(lab, dtype=int), 'clinical_note': np.asarray(clin, dtype=int),
+        'billing_info': np.asarray(bill, dtype=int), 'purpose': purpose, 'label': label
+    }, index=pd.RangeIndex(len(principal)))
+
+
+def make_benign_rows(count, rng, doctors, billing, phi_patients, phi_records, patient_to_doctor, unrestricted_map, purpose_role_attrs, principal_role):
+    # 80% doctor legitimate reads, the rest billing clerks reading billing info
+    num_doctor = rng.binomial(count, 0.8)
+    num_clerk = count - num_doctor
+
+    # doctor rows: the patient's assigned doctor when available, else any doctor
+    # (phi_records[k] is the record of phi_patients[k])
+    patient_idx = rng.integers(len(phi_patients), size=num_doctor)
+    assigned = np.array([patient_to_doctor.get(p) for p in phi_patients], dtype=object)[patient_idx]
+    doctor = np.where(pd.isna(assigned), pick(doctors or ['doc_0'], rng, num_doctor), assigned)
+    # a purpose that the patient has allowed when possible
+    purpose_lists = [unrestricted_map.get(p) or ['diagnosis', 'research'] for p in phi_patients]
+    purpose = pick_per_group(purpose_lists, patient_idx, rng)
+    # set attributes only if allowed by role and purpose
+    roles = pd.Series(doctor).map(principal_role).to_numpy(dtype=object)
+    lab = role_allows(roles, purpose, 'lab_result', purpose_role_attrs) & (rng.random(num_doctor) < 0.8)
+    clin = role_allows(roles, purpose, 'clinical_note', purpose_role_attrs) & (rng.random(num_doctor) < 0.8)
+    bill = role_allows(roles, purpose, 'billing_info', purpose_role_attrs) & (rng.random(num_doctor) < 0.05)
+    doctor_rows = read_rows(doctor, np.asarray(phi_records, dtype=object)[patient_idx], purpose, lab, clin, bill, 'benign')
+
+    # billing clerk rows: billing clerks should only access billing_info
+    clerk_rows = read_rows(pick(billing or ['bclerk_0'], rng, num_clerk), pick(phi_records, rng, num_clerk),
+                           'billing', 0, 0, 1, 'benign')
+    return pd.concat([doctor_rows, clerk_rows], ignore_index=True)
+
+
+def make_hipaa_auth_rows(count, rng, doctors, phi_patients, phi_records, patient_to_doctor, unrestricted_purposes, purpose_role_attrs):
+    # doctor reads a PHI record not belonging to their patient:
+    # pick a patient and then a doctor who is NOT the assigned doctor
+    patient_idx = rng.integers(len(phi_patients), size=count)
+    # group g < len(doctors): patients assigned to doctors[g]; the last group: no assigned doctor
+    doctor_pos = {d: g for g, d in enumerate(doctors)}
+    patient_group = np.array([doctor_pos.get(patient_to_doctor.get(p), len(doctors)) for p in phi_patients])
+    other_doctors = [[other for other in doctors if other != d] or doctors for d in doctors] + [doctors or ['doc_0']]
+    doctor = pick_per_group(other_doctors, patient_group[patient_idx], rng)
+    # pick a purpose that is NOT restricted for this patient to avoid GDPR overlap
+    purpose_lists = [unrestricted_purposes.get(p, ALL_PURPOSES) or ['diagnosis'] for p in phi_patients]
+    purpose = pick_per_group(purpose_lists, patient_idx, rng)
+    # a single attribute allowed for doctors for this purpose; clinical_note if nothing lines up
+    doctor_attr = {p: (purpose_role_attrs.get(('doctor', p)) or ['clinical_note'])[0] for p in ALL_PURPOSES}
+    chosen_attr = pd.Series(purpose).map(doctor_attr).to_numpy(dtype=object)
+    return read_rows(doctor, np.asarray(phi_records, dtype=object)[patient_idx], purpose,
+                     chosen_attr == 'lab_result', chosen_attr == 'clinical_note', chosen_attr == 'billing_info',
+                     'violation_hipaa_auth')
+
+
+def make_min_necessary_rows(count, rng, billing, phi_records):
+    # billing clerk reads exactly one disallowed attribute (clinical_note or lab_result)
+    # for purpose billing
+    lab = rng.random(count) < 0.5
+    return read_rows(pick(billing or ['bclerk_0'], rng, count), pick(phi_records, rng, count), 'billing',
+                     lab, ~lab, 0, 'violation_hipaa_min_necessary')
+
+
+def make_art18_rows(count, rng, doctors, billing, phi_map, phi_records, restricted_map, patient_to_doctor, purpose_role_attrs, principal_role):
+    # a patient that has a restriction for a purpose, reading for that purpose
+    restricted_patients = tuple(restricted_map)
+    patient_idx = rng.integers(len(restricted_patients), size=count)
+    purpose = pick_per_group([restricted_map[p] or ALL_PURPOSES for p in restricted_patients], patient_idx, rng)
+    record = np.array([phi_map.get(p) for p in restricted_patients], dtype=object)[patient_idx]
+    record = np.where(pd.isna(record), pick(phi_records, rng, count), record)
+    assigned = np.array([patient_to_doctor.get(p) for p in restricted_patients], dtype=object)[patient_idx]
+    assigned_role = pd.Series(assigned).map(principal_role).to_numpy(dtype=object)
+    fallback_principal = np.where(pd.isna(assigned), pick(doctors + billing or ['doc_0'], rng, count), assigned)
+    attr_draw = rng.random(count)
+
+    # prefer the assigned doctor, else a billing clerk: the first candidate whose role
+    # allows at least one of the purpose attributes. That only depends on the assigned
+    # doctor's role and the purpose, so rows are resolved a (role, purpose) group at a
+    # time (no assigned doctor or role -> NaN, which allows nothing). The billing clerks
+    # share one role, so the first of them stands for all.
+    principal = np.empty(count, dtype=object)
+    chosen_attr = np.empty(count, dtype=object)
+    clerk_role = principal_role.get(billing[0]) if billing else None
+    groups = pd.DataFrame({'role': assigned_role, 'purpose': purpose}).groupby(['role', 'purpose'], dropna=False).indices
+    for (role, group_purpose), rows in groups.items():
+        assigned_attrs = purpose_role_attrs.get((role, group_purpose), [])
+        clerk_attrs = purpose_role_attrs.get((clerk_role, group_purpose), []) if billing else []
+        if assigned_attrs or clerk_attrs:
+            principal[rows] = assigned[rows] if assigned_attrs else billing[0]
+            possible = np.asarray(assigned_attrs or clerk_attrs, dtype=object)
+            chosen_attr[rows] = possible[(attr_draw[rows] * len(possible)).astype(int)]
         else:
-            # fallback to a hipaa_auth if no restricted entries exist
-            return make_violation_entry(log_id, doctors, billing, patients, phi_map, restricted_map, 'hipaa_auth', patient_to_doctor, unrestricted_map)
+            # fallback: the assigned doctor or a random principal, with the first purpose
+            # attribute (may cause overlap)
+            principal[rows] = fallback_principal[rows]
+            chosen_attr[rows] = (PURPOSE_TO_ATTRIBUTES.get(group_purpose) or ['clinical_note'])[0]
+    return read_rows(principal, record, purpose,
+                     chosen_attr == 'lab_result', chosen_attr == 'clinical_note', chosen_attr == 'billing_info',
+                     'violation_gdpr_art18')
 
 
-def generate_for_size(n, doctors, billing, patients, phi_map, phi_records, restricted_map, out_path, patient_to_doctor, unrestricted_map, role_access):
-    rows = []
+def generate_for_size(n, doctors, billing, patients, phi_map, phi_records, restricted_map, out_path, patient_to_doctor, unrestricted_map, purpose_role_attrs, principal_role, rng):
     num_viol = max(1, int(n * VIOLATION_RATE))
     num_benign = n - num_viol
-    # prepare violation types roughly equally split
-    viol_types = ['hipaa_auth', 'hipaa_min_necessary', 'gdpr_art18_restriction']
-    viol_list = []
-    for i in range(num_viol):
-        viol_list.append(random.choice(viol_types))
-    # shuffle slots
-    items = []
-    for i in range(num_benign):
-        items.append(('benign', None))
-    for v in viol_list:
-        items.append(('viol', v))
-    random.shuffle(items)
-
-    # generate rows
-    for idx, (kind, vtype) in enumerate(items):
-        lid = f'log_{idx}'
-        if kind == 'benign':
-            entry = make_benign_entry(lid, doctors, billing, patients, phi_map, patient_to_doctor, unrestricted_map, role_access)
-        else:
-            entry = make_violation_entry(lid, doctors, billing, patients, phi_map, restricted_map, vtype, patient_to_doctor, unrestricted_map, role_access)
-        rows.append(entry)
+    # number of rows of each violation type, roughly equally split;
+    # gdpr_art18 rows fall back to hipaa_auth if no restricted entries exist
+    viol_counts = dict(zip(VIOLATION_TYPES, np.bincount(rng.integers(len(VIOLATION_TYPES), size=num_viol),
+                                                        minlength=len(VIOLATION_TYPES)).tolist()))
+    if not restricted_map:
+        viol_counts['hipaa_auth'] += viol_counts.pop('gdpr_art18_restriction')
+
+    # Filtered purposes for hipaa_auth violations: each restricted patient's unrestricted purposes
+    unrestricted_purposes = {p: [purpose for purpose in ALL_PURPOSES if purpose not in purposes]
+                             for p, purposes in restricted_map.items()}
+    phi_patients = tuple(phi_map)
+
+    # The timestamps of all rows, uniform over [START_DATE, END_DATE] at second
+    # resolution, drawn in one call
+    timestamps = np.datetime64(START_DATE, 's') + rng.integers(0, SPAN_SECONDS + 1, size=n).astype('timedelta64[s]')
 
-    # write CSV
+    # Rows are generated a bucket at a time: the benign rows, then the rows of each
+    # violation type. Every random value of a bucket is drawn from rng as one array,
+    # and the bucket's columns are built from those arrays; the log is shuffled once below.
+    buckets = [make_benign_rows(num_benign, rng, doctors, billing, phi_patients, phi_records, patient_to_doctor,
+                                unrestricted_map, purpose_role_attrs, principal_role),
+               make_hipaa_auth_rows(viol_counts['hipaa_auth'], rng, doctors, phi_patients, phi_records, patient_to_doctor,
+                                    unrestricted_purposes, purpose_role_attrs),
+               make_min_necessary_rows(viol_counts['hipaa_min_necessary'], rng, billing, phi_records)]
+    if 'gdpr_art18_restriction' in viol_counts:
+        buckets.append(make_art18_rows(viol_counts['gdpr_art18_restriction'], rng, doctors, billing, phi_map, phi_records,
+                                       restricted_map, patient_to_doctor, purpose_role_attrs, principal_role))
+    # write CSV; one DataFrame serves both the CSV and the Parquet copy
     cols = ['log_id','principal','action','resource','lab_result','clinical_note','billing_info','purpose','timestamp','label']
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open('w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=cols)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-    print(f'Wrote {len(rows)} rows to {out_path}')
+    # Shuffle so violations are spread; log ids follow the shuffled order and the
+    # timestamps are formatted to ISO text in one NumPy pass
+    log_df = pd.concat(buckets, ignore_index=True).iloc[rng.permutation(n)].reset_index(drop=True)
+    log_df = log_df.assign(log_id=[f'log_{idx}' for idx in range(n)],
+                           timestamp=np.datetime_as_string(timestamps, unit='s'))[cols]
+    # CRLF rows, as csv.DictWriter wrote them; the Parquet copy stores the timestamps
+    # parsed so loading it needs no date parsing
+    data_loader.write_table(log_df, out_path, parquet_df=log_df.assign(timestamp=timestamps), lineterminator='\r\n')
+    print(f'Wrote {len(log_df)} rows to {out_path}')
 
 
 def main():
-    random.seed(0)
+    rng = np.random.default_rng(0)
     kb = load_kb()
-    doctors, billing, patients, phi_map, phi_records, restricted_map, patient_to_doctor, unrestricted_map, role_access = extract_entities(kb)
+    doctors, billing, patients, phi_map, phi_records, restricted_map, patient_to_doctor, unrestricted_map, purpose_role_attrs, principal_role = extract_entities(kb)
     for n in SIZES:
         out_file = OUT_DIR / f'staff_activity_{n}.csv'
-        generate_for_size(n, doctors, billing, patients, phi_map, phi_records, restricted_map, out_file, patient_to_doctor, unrestricted_map, role_access)
+        generate_for_size(n, doctors, billing, patients, phi_map, phi_records, restricted_map, out_file, patient_to_doctor, unrestricted_map, purpose_role_attrs, principal_role, rng)
 
 
 if __name__ == '__main__':